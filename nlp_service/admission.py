@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+LANES = ('interactive', 'bulk')
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LatencyTracker:
+    """Rolling window of recent LLM call durations (seconds)"""
+
+    def __init__(self, window: int = 200, default_seconds: float = 5.0):
+        self.default_seconds = default_seconds
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Duration at the given percentile (0-1), or the default until samples exist"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return self.default_seconds
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class AdmissionController:
+    """
+    Queue-depth and in-flight based admission control with prioritized lanes.
+
+    At most `max_in_flight` requests run at once; up to `max_queue` more wait
+    for a slot, and anything beyond that is rejected immediately so callers can
+    back off (503 + Retry-After) instead of timing out. 'interactive' requests
+    are always admitted first. 'bulk' requests only run when no interactive
+    request is waiting, and use at most `bulk_share` of the slots.
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 32, bulk_share: float = 0.5,
+                 queue_timeout: float = 10, latency: Optional[LatencyTracker] = None):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.bulk_limit = max(1, int(max_in_flight * bulk_share))
+        self.queue_timeout = queue_timeout
+        self.latency = latency or LatencyTracker()
+        self._in_flight = {lane: 0 for lane in LANES}
+        self._waiting = {lane: 0 for lane in LANES}
+        self._rejected = {lane: 0 for lane in LANES}
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def admit(self, lane: str, deadline: Optional[float] = None) -> Iterator[None]:
+        """
+        Hold a slot for the duration of the block.
+
+        Args:
+            lane: 'interactive' or 'bulk' (unknown lanes are treated as interactive)
+            deadline: time.monotonic() value after which waiting is pointless
+
+        Raises:
+            AdmissionRejected: If the queue is full or no slot frees up in time
+        """
+        lane = lane if lane in LANES else 'interactive'
+        self._acquire(lane, deadline)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight[lane] -= 1
+                self._condition.notify_all()
+
+    def _acquire(self, lane: str, deadline: Optional[float]):
+        with self._condition:
+            if sum(self._waiting.values()) >= self.max_queue and not self._can_run(lane):
+                self._rejected[lane] += 1
+                raise AdmissionRejected('queue_full', self._retry_after())
+
+            wait_until = time.monotonic() + self.queue_timeout
+            if deadline is not None:
+                wait_until = min(wait_until, deadline)
+
+            self._waiting[lane] += 1
+            try:
+                while not self._can_run(lane):
+                    remaining = wait_until - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected[lane] += 1
+                        raise AdmissionRejected('queue_timeout', self._retry_after())
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting[lane] -= 1
+            self._in_flight[lane] += 1
+
+    def _can_run(self, lane: str) -> bool:
+        if sum(self._in_flight.values()) >= self.max_in_flight:
+            return False
+        if lane == 'bulk':
+            return self._waiting['interactive'] == 0 and self._in_flight['bulk'] < self.bulk_limit
+        return True
+
+    def _retry_after(self) -> int:
+        """Seconds until the current queue is likely to drain"""
+        queued = sum(self._waiting.values()) + sum(self._in_flight.values())
+        return max(1, math.ceil(self.latency.percentile(0.5) * queued / self.max_in_flight))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'in_flight': dict(self._in_flight),
+                'waiting': dict(self._waiting),
+                'rejected': dict(self._rejected),
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'llm_latency_p50': round(self.latency.percentile(0.5), 3),
+                'llm_latency_p95': round(self.latency.percentile(0.95), 3),
+            }
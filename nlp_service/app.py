@@ -1,14 +1,36 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 import os
 import json
+import time
+import hashlib
+import difflib
+import atexit
+import hmac
 import logging
+import threading
+from functools import wraps
 from dotenv import load_dotenv
-import google.generativeai as genai
 from cv_parser import CVParser
 from keyword_extractor import KeywordExtractor
 from section_detector import SectionDetector
 from ats_analyzer import ATSAnalyzer
 from suggestion_generator import SuggestionGenerator
+from llm_backend import create_backend, estimate_tokens
+from document_store import DocumentStore
+from near_duplicate import NearDuplicateIndex
+from shared_ingest import SharedIngest, SharedPathError
+from cv_classifier import CVClassifier, DEFAULT_MODEL_PATH
+from patch_generator import PatchGenerator
+from admission import AdmissionController, AdmissionRejected, LatencyTracker
+from llm_guard import CircuitBreaker, CircuitOpenError, HedgedLLMClient
+from local_analysis import LocalAnalyzer
+from prompts import ANALYZE_CV, IMPROVE_CV, MATCH_JOB, REANALYZE_CV, Prompt
+from search_index import CandidateIndex
+from experience_timeline import DEGREE_LEVELS, ExperienceTimelineParser, ProfileTable
+from profiler import StackSampler, profile_process
+from usage_tracker import BudgetExceeded, UsageTracker, parse_api_keys, parse_budgets
+from encoding import (MessagePackRequest, NegotiatingJSONProvider, RequestDecompressor, ResponseCompressor,
+                      response_payload, set_response_payload)
 from flask_cors import CORS
 
 app = Flask(__name__)
@@ -25,19 +47,135 @@ app = Flask(__name__)
 # Configure maximum file size (10MB)
 app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in environment variables")
-
-genai.configure(api_key=GEMINI_API_KEY)
+# Wire encodings: compact JSON (orjson when installed), MessagePack bodies for
+# clients that ask for them, and gzip/zstd on large responses and request bodies
+app.json = NegotiatingJSONProvider(app)
+app.request_class = MessagePackRequest
+if os.getenv('RESPONSE_COMPRESSION', 'true').lower() == 'true':
+    response_compressor = ResponseCompressor(
+        min_size=int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024')),
+        gzip_level=int(os.getenv('GZIP_LEVEL', '5')),
+        zstd_level=int(os.getenv('ZSTD_LEVEL', '3'))
+    )
+    app.after_request(response_compressor.compress)
+app.wsgi_app = RequestDecompressor(app.wsgi_app, app.config['MAX_CONTENT_LENGTH'])
 
-# Initialize Gemini model
-model = genai.GenerativeModel('gemini-2.0-flash')
+# Configure LLM backend ('gemini' by default, 'fake' for offline load testing)
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+model = create_backend()
+logger.info(f"Using LLM backend: {model.name}")
 
 # Supported file formats
 SUPPORTED_FORMATS = {'pdf', 'doc', 'docx'}
 
+# Minimum extracted text length for a usable CV
+MIN_CV_TEXT_LENGTH = 50
+
+# Upload-once store of parsed documents, referenced by document_id from every route.
+# New documents are matched against recent ones with MinHash/LSH to find near duplicates.
+document_store = DocumentStore(
+    max_entries=int(os.getenv('DOCUMENT_STORE_MAX_ENTRIES', '1000')),
+    ttl_seconds=float(os.getenv('DOCUMENT_STORE_TTL', '3600')),
+    near_duplicates=NearDuplicateIndex(
+        threshold=float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.8')),
+        max_entries=int(os.getenv('DOCUMENT_STORE_MAX_ENTRIES', '1000'))
+    )
+)
+
+# Default handling of near-duplicate CVs in /analyze-cv: 'off', 'reuse' or 'diff'
+NEAR_DUPLICATE_MODE = os.getenv('NEAR_DUPLICATE_MODE', 'off').lower()
+# Stored-result key of analyses updated from a near duplicate's (diff mode)
+DIFFED_ANALYSIS_KEY = f"{REANALYZE_CV.fingerprint}:{ANALYZE_CV.fingerprint}"
+
+# Optional shared-volume ingest: callers pass a path under this read-only mount
+SHARED_INGEST_ROOT = os.getenv('SHARED_INGEST_ROOT')
+shared_ingest = SharedIngest(SHARED_INGEST_ROOT, app.config['MAX_CONTENT_LENGTH']) if SHARED_INGEST_ROOT else None
+
+# Local CV-validity gate: rejects obvious non-CVs before paying for an LLM call.
+# Off by default; see fixtures/cv_gate.jsonl for its measured precision/recall.
+cv_gate = CVClassifier(
+    model_path=os.getenv('CV_GATE_MODEL') or DEFAULT_MODEL_PATH,
+    reject_below=float(os.getenv('CV_GATE_REJECT_BELOW', '0.15'))
+) if os.getenv('CV_GATE_ENABLED', 'false').lower() == 'true' else None
+
+# Section-level improvement patches for /generate-improvements
+patch_generator = PatchGenerator()
+
+# Admission control for LLM routes: bounded in-flight work and queue, with
+# interactive requests prioritized over bulk ones (X-Request-Lane header)
+llm_latency = LatencyTracker(
+    window=int(os.getenv('LLM_LATENCY_WINDOW', '200')),
+    default_seconds=float(os.getenv('LLM_LATENCY_DEFAULT', '5'))
+)
+admission = AdmissionController(
+    max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '8')),
+    max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '32')),
+    bulk_share=float(os.getenv('ADMISSION_BULK_SHARE', '0.5')),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '10')),
+    latency=llm_latency
+)
+
+# Percentile of recent LLM latency a request's remaining deadline must cover
+DEADLINE_LLM_PERCENTILE = float(os.getenv('DEADLINE_LLM_PERCENTILE', '0.5'))
+
+# Hedged LLM calls behind a circuit breaker; while the circuit is open,
+# /analyze-cv and /match-job answer from the local heuristic analyzers
+llm_client = HedgedLLMClient(
+    model,
+    llm_latency,
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('LLM_CIRCUIT_FAILURES', '5')),
+        reset_timeout=float(os.getenv('LLM_CIRCUIT_RESET', '30'))
+    ),
+    hedging=os.getenv('LLM_HEDGING', 'true').lower() == 'true',
+    hedge_percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', '0.95')),
+    min_hedge_delay=float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.5')),
+    max_hedge_ratio=float(os.getenv('LLM_HEDGE_MAX_RATIO', '0.1')),
+    max_retry_ratio=float(os.getenv('LLM_RETRY_MAX_RATIO', '0.1')),
+    timeout=float(os.getenv('LLM_TIMEOUT', '60')),
+    workers=2 * admission.max_in_flight
+)
+local_analyzer = LocalAnalyzer()
+
+# Token and cost accounting per route, tenant and prompt version. Tenants over
+# their token budget get local analysis instead of an LLM call.
+usage_tracker = UsageTracker(
+    budgets=parse_budgets(os.getenv('TENANT_TOKEN_BUDGETS', '')),
+    default_budget=int(os.getenv('DEFAULT_TENANT_TOKEN_BUDGET', '0')),
+    window_seconds=float(os.getenv('TENANT_BUDGET_WINDOW', '86400')),
+    input_cost_per_million=float(os.getenv('LLM_COST_INPUT_PER_MTOK', '0.10')),
+    output_cost_per_million=float(os.getenv('LLM_COST_OUTPUT_PER_MTOK', '0.40')),
+    cached_cost_per_million=float(os.getenv('LLM_COST_CACHED_PER_MTOK', '0.025')),
+    max_tenants=int(os.getenv('USAGE_MAX_TENANTS', '1000'))
+)
+# Tenants are identified by API key only ('tenant-a=key1,tenant-b=key2'), so a
+# caller cannot pick another tenant's budget or dodge its own
+TENANT_API_KEYS = parse_api_keys(os.getenv('TENANT_API_KEYS', ''))
+
+# Local inverted index of candidate CVs for job-to-pool search (persisted when SEARCH_INDEX_DIR is set)
+candidate_index = CandidateIndex(
+    directory=os.getenv('SEARCH_INDEX_DIR') or None,
+    flush_every=int(os.getenv('SEARCH_INDEX_FLUSH_EVERY', '500')),
+    max_segments=int(os.getenv('SEARCH_INDEX_MAX_SEGMENTS', '8'))
+)
+atexit.register(candidate_index.flush)
+
+# Local experience/degree profiles of indexed candidates, for filtering without an LLM
+profile_parser = ExperienceTimelineParser()
+profile_table = ProfileTable(
+    path=os.path.join(os.getenv('SEARCH_INDEX_DIR'), 'profiles.npz') if os.getenv('SEARCH_INDEX_DIR') else None,
+    save_every=int(os.getenv('SEARCH_INDEX_FLUSH_EVERY', '500'))
+)
+atexit.register(profile_table.save)
+
+# Admin endpoints (live profiling) are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+PROFILER_MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '60'))
+# Requests sent with X-Profile (and the admin token) get a profile summary when slower than this
+PROFILE_SLOW_REQUEST_MS = float(os.getenv('PROFILE_SLOW_REQUEST_MS', '2000'))
+PROFILE_REQUEST_INTERVAL_MS = float(os.getenv('PROFILE_REQUEST_INTERVAL_MS', '10'))
+process_profile_lock = threading.Lock()
+
 def validate_file_format(filename):
     """Validate that the file has a supported format"""
     if not filename:
@@ -45,24 +183,472 @@ def validate_file_format(filename):
     ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
     return ext in SUPPORTED_FORMATS
 
+def clean_json_response(result_text):
+    """Strip markdown code blocks that Gemini sometimes wraps around JSON"""
+    if "```json" in result_text:
+        return result_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in result_text:
+        return result_text.split("```")[1].split("```")[0].strip()
+    return result_text
+
+def request_param(name, default=None):
+    """Read a request parameter from form data or a JSON body"""
+    if name in request.form:
+        return request.form.get(name)
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and name in data:
+        return data[name]
+    return default
+
+def document_not_found():
+    """Error response for an unknown or expired document_id"""
+    return jsonify({
+        'success': False,
+        'error': 'Document not found or expired. Please upload the file again.'
+    }), 404
+
+def load_cv_document(no_file_error='No file provided'):
+    """
+    Resolve the CV for a request from a `document_id`, a shared-volume `path`
+    or an uploaded `file`.
+    
+    File content is hashed first, so a file already in the document store is
+    not extracted again. Records with enough text are stored for reuse.
+    
+    Returns:
+        (record, None) on success, or (None, error response) on failure
+    """
+    document_id = request_param('document_id')
+    if document_id:
+        record = document_store.get(document_id)
+        if record is None:
+            logger.warning(f"Unknown document_id: {document_id}")
+            return None, document_not_found()
+        return record, None
+    
+    path = request_param('path')
+    if path:
+        return load_shared_document(path)
+    
+    # Check if file is in request
+    if 'file' not in request.files:
+        logger.warning("No file in request")
+        return None, (jsonify({
+            'success': False,
+            'error': no_file_error
+        }), 400)
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        logger.warning("Empty filename")
+        return None, (jsonify({
+            'success': False,
+            'error': 'No file selected'
+        }), 400)
+    
+    # Validate file format
+    if not validate_file_format(file.filename):
+        logger.warning(f"Unsupported file format: {file.filename}")
+        return None, (jsonify({
+            'success': False,
+            'error': 'Unsupported file format. Please upload PDF, DOC or DOCX files.'
+        }), 400)
+    
+    return ingest_content(file.read(), file.filename)
+
+def load_shared_document(path):
+    """Resolve a CV from a path under the shared ingest mount (memory-mapped, no upload)"""
+    if shared_ingest is None:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Path ingest is not enabled on this service'
+        }), 400)
+    
+    if not validate_file_format(path):
+        logger.warning(f"Unsupported file format: {path}")
+        return None, (jsonify({
+            'success': False,
+            'error': 'Unsupported file format. Please upload PDF, DOC or DOCX files.'
+        }), 400)
+    
+    try:
+        with shared_ingest.open_mapped(path) as file_content:
+            return ingest_content(file_content, os.path.basename(path))
+    except SharedPathError as e:
+        logger.warning(f"Rejected shared path {path}: {str(e)}")
+        return None, (jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400)
+    except FileNotFoundError:
+        return None, (jsonify({
+            'success': False,
+            'error': 'File not found'
+        }), 404)
+
+def ingest_content(file_content, filename):
+    """Look up file content in the document store, extracting and storing it if new"""
+    document_id = document_store.content_hash(file_content)
+    record = document_store.get(document_id)
+    if record is not None:
+        logger.info(f"Reusing stored document {document_id[:12]}")
+        document_store.add_tenant(record, document_owner())
+        return record, None
+    
+    # Parse CV to extract text
+    try:
+        cv_text = CVParser().extract_text_from_bytes(file_content, filename)
+    except ValueError as e:
+        logger.error(f"Failed to extract text: {str(e)}")
+        return None, (jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400)
+    
+    if cv_text and len(cv_text.strip()) >= MIN_CV_TEXT_LENGTH:
+        return document_store.add(document_id, cv_text, filename, document_owner()), None
+    return {'document_id': None, 'text': cv_text}, None
+
+def find_previous_analysis(document):
+    """
+    The most similar near duplicate uploaded by the same tenant that already
+    has a full analysis for the current prompt version. Anonymous callers
+    never reuse analyses of other documents.
+    
+    Returns:
+        (record, analysis, similarity), or None
+    """
+    for match in document_store.near_duplicates(document, document_owner()):
+        record = document_store.get(match['document_id'])
+        analysis = document_store.cached_result(record, ANALYZE_CV.fingerprint) if record else None
+        if analysis:
+            return record, analysis, match['similarity']
+    return None
+
+def cv_changes(previous_text, cv_text):
+    """Changed lines between two versions of a CV, prefixed with '-' or '+'"""
+    diff = difflib.unified_diff(previous_text.splitlines(), cv_text.splitlines(), lineterm='', n=0)
+    return '\n'.join(
+        line for line in diff
+        if line[:1] in '+-' and not line.startswith(('+++', '---')) and line[1:].strip()
+    )
+
+def admission_controlled(view):
+    """
+    Mark a route as calling the LLM under admission control.
+    
+    Reads the lane from X-Request-Lane ('interactive' by default, or 'bulk')
+    and an optional X-Request-Deadline-Ms budget, both kept in `g`. The
+    admission slot itself is taken by call_llm() only around the LLM call, so
+    uploads, text extraction and cached answers never queue for LLM
+    concurrency. Requests shed while saturated get a fast 503 with Retry-After;
+    routes must re-raise AdmissionRejected for this.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.deadline = None
+        budget = request.headers.get('X-Request-Deadline-Ms')
+        if budget:
+            try:
+                g.deadline = time.monotonic() + float(budget) / 1000.0
+            except ValueError:
+                logger.warning(f"Ignoring invalid X-Request-Deadline-Ms: {budget}")
+        g.lane = request.headers.get('X-Request-Lane', 'interactive').lower()
+        
+        try:
+            return view(*args, **kwargs)
+        except AdmissionRejected as e:
+            logger.warning(f"Shedding {g.lane} request to {request.path}: {e.reason}")
+            response = jsonify({
+                'success': False,
+                'error': 'Service is busy. Please retry later.',
+                'reason': e.reason
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+    return wrapper
+
+def check_llm_deadline():
+    """
+    Error response if the request's deadline leaves too little time for an
+    LLM call (judged from recent LLM latency), otherwise None.
+    """
+    deadline = g.get('deadline')
+    # An open circuit is answered locally without waiting on the LLM
+    if deadline is None or llm_client.breaker.state == CircuitBreaker.OPEN:
+        return None
+    remaining = deadline - time.monotonic()
+    expected = llm_latency.percentile(DEADLINE_LLM_PERCENTILE)
+    if remaining >= expected:
+        return None
+    logger.warning(f"Skipping LLM call: {remaining:.2f}s left, expected {expected:.2f}s")
+    return jsonify({
+        'success': False,
+        'error': 'Request deadline is too short to complete the analysis',
+        'error_type': 'DeadlineExceeded'
+    }), 504
+
+def is_admin_request():
+    """Whether the request carries ADMIN_TOKEN (Authorization: Bearer, or X-Admin-Token)"""
+    if not ADMIN_TOKEN:
+        return False
+    authorization = request.headers.get('Authorization', '')
+    token = authorization[7:] if authorization.startswith('Bearer ') else request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+def admin_only(view):
+    """Hide a route unless ADMIN_TOKEN is configured, and require the token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'success': False, 'error': 'Not found'}), 404
+        if not is_admin_request():
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def profiled_if_slow(view):
+    """
+    Sample the request's thread while the route runs when the caller asks for
+    it with an X-Profile header and the admin token. If the request takes
+    longer than PROFILE_SLOW_REQUEST_MS, the profile summary is logged and
+    attached to the JSON response as `profile`.
+    
+    Only the request thread is sampled: time spent in worker processes (doc
+    conversion, OCR) or on LLM executor threads shows up as the request
+    thread waiting, not in `top_own`. The summary therefore splits the wall
+    time into the request thread's CPU time (`cpu_ms`) and the rest
+    (`wait_ms`).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.headers.get('X-Profile', '').lower() not in ('1', 'true') or not is_admin_request():
+            return view(*args, **kwargs)
+        
+        sampler = StackSampler(PROFILE_REQUEST_INTERVAL_MS / 1000.0, thread_id=threading.get_ident()).start()
+        cpu_started = time.thread_time()
+        try:
+            response = app.make_response(view(*args, **kwargs))
+        finally:
+            cpu_seconds = time.thread_time() - cpu_started
+            profile = sampler.stop()
+        if profile.duration * 1000 < PROFILE_SLOW_REQUEST_MS:
+            return response
+        
+        summary = profile.summary()
+        summary['cpu_ms'] = round(min(cpu_seconds, profile.duration) * 1000, 1)
+        summary['wait_ms'] = round(summary['duration_ms'] - summary['cpu_ms'], 1)
+        logger.warning(f"Slow request to {request.path} ({summary['duration_ms']} ms, "
+                       f"{summary['cpu_ms']} ms CPU, {summary['wait_ms']} ms waiting); "
+                       f"hottest: {[entry['function'] for entry in summary['top_own'][:3]]}")
+        data = response_payload(response)
+        if isinstance(data, dict):
+            data['profile'] = summary
+            set_response_payload(response, data)
+        return response
+    return wrapper
+
+def document_owner():
+    """Tenant owning the documents this request uploads, or None for anonymous callers"""
+    tenant = request_tenant()
+    return None if tenant == 'anonymous' else tenant
+
+def request_tenant():
+    """
+    Tenant for usage accounting: the tenant whose key (TENANT_API_KEYS) is sent
+    as X-API-Key, else 'anonymous'. Unknown keys share the anonymous budget.
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return TENANT_API_KEYS.get(hashlib.sha256(api_key.encode('utf-8')).hexdigest(), 'anonymous')
+    return 'anonymous'
+
+def call_llm(prompt, validate=None):
+    """
+    Call the LLM through the hedged client, holding an admission slot for the
+    request's lane while it runs. Call durations feed both hedging
+    and admission decisions. The estimated tokens are held against the
+    tenant's budget during the call, and the usage reported by every backend
+    response that arrives before the call settles (retries and hedges
+    included, abandoned attempts not) is recorded for the route, tenant and
+    prompt version.
+    
+    Raises:
+        AdmissionRejected: If the LLM is saturated (queue full or deadline too short)
+        CircuitOpenError: If the circuit breaker is open
+        BudgetExceeded: If the tenant's token budget cannot cover the call
+    """
+    route = request.path
+    tenant = request_tenant()
+    prompt_version = prompt.template.fingerprint if isinstance(prompt, Prompt) else 'unversioned'
+    estimated_prompt_tokens = estimate_tokens(str(prompt))
+    
+    def record_usage(response):
+        usage_tracker.record(route, tenant, prompt_version,
+                             getattr(response, 'usage_metadata', None), estimated_prompt_tokens)
+    
+    with usage_tracker.reserve(tenant, estimated_prompt_tokens + usage_tracker.expected_output(prompt_version)):
+        with admission.admit(g.get('lane', 'interactive'), g.get('deadline')):
+            return llm_client.generate_content(prompt, validate, on_response=record_usage)
+
+def is_json_response(response):
+    """Whether an LLM response contains parseable JSON"""
+    try:
+        json.loads(clean_json_response(response.text))
+        return True
+    except ValueError:
+        return False
+
+def llm_unavailable(error):
+    """
+    Error for routes without a local fallback: 503 while the circuit is open,
+    429 when the tenant's token budget is used up
+    """
+    if isinstance(error, BudgetExceeded):
+        response = jsonify({
+            'success': False,
+            'error': 'Token budget exhausted. Please retry later.'
+        })
+        response.status_code = 429
+    else:
+        response = jsonify({
+            'success': False,
+            'error': 'The AI service is temporarily unavailable. Please retry later.'
+        })
+        response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, int(error.retry_after)))
+    return response
+
+def degraded_reason(error):
+    """Why a route answered from the local analyzers"""
+    return 'budget_exhausted' if isinstance(error, BudgetExceeded) else 'llm_unavailable'
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'service': 'CV Analyzer NLP Service',
-        'gemini_configured': GEMINI_API_KEY is not None
+        'gemini_configured': GEMINI_API_KEY is not None,
+        'llm_backend': model.name,
+        'admission': admission.stats(),
+        'llm': llm_client.stats(),
+        'search_index': candidate_index.stats()
+    })
+
+@app.route('/admin/profile', methods=['POST'])
+@admin_only
+def admin_profile():
+    """
+    Profile the live process by sampling all threads' stacks for `seconds`
+    (default 10). Returns collapsed stacks for flamegraph tools by default,
+    or a JSON summary with format=json. Parameters may be sent in the query
+    string, form data or a JSON body.
+    """
+    def param(name):
+        return request.args.get(name) or request_param(name)
+    
+    try:
+        seconds = float(param('seconds') or 10)
+        interval_ms = float(param('interval_ms') or 5)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'seconds and interval_ms must be numbers'
+        }), 400
+    if not 0 < seconds <= PROFILER_MAX_SECONDS or not 1 <= interval_ms <= 1000:
+        return jsonify({
+            'success': False,
+            'error': f'seconds must be in (0, {PROFILER_MAX_SECONDS:g}] and interval_ms in [1, 1000]'
+        }), 400
+    include_idle = str(param('include_idle') or 'false').lower() == 'true'
+    
+    if not process_profile_lock.acquire(blocking=False):
+        return jsonify({
+            'success': False,
+            'error': 'A profile is already running'
+        }), 409
+    try:
+        logger.info(f"Profiling process for {seconds:g}s every {interval_ms:g} ms")
+        profile = profile_process(seconds, interval_ms / 1000.0, include_idle)
+    finally:
+        process_profile_lock.release()
+    
+    if str(param('format') or 'collapsed').lower() == 'json':
+        return jsonify({'success': True, 'profile': profile.summary()})
+    response = app.response_class(profile.collapsed(), mimetype='text/plain')
+    response.headers['Content-Disposition'] = f'attachment; filename=profile-{int(time.time())}.folded'
+    return response
+
+@app.route('/usage', methods=['GET'])
+@admin_only
+def usage():
+    """
+    LLM token usage and estimated cost per route, tenant and prompt version,
+    with each tenant's budget state. `?tenant=` restricts it to one tenant.
+    """
+    return jsonify({
+        'success': True,
+        'usage': usage_tracker.stats(request.args.get('tenant') or None)
+    })
+
+@app.route('/documents', methods=['POST'])
+def create_document():
+    """
+    Extract and store a CV once, returning a document_id usable by
+    /analyze-cv, /match-job and /generate-improvements.
+    """
+    try:
+        document, error = load_cv_document('No file provided')
+        if error:
+            return error
+        
+        if not document['document_id']:
+            return jsonify({
+                'success': False,
+                'error': 'Could not extract enough text from the document. The file may be empty or contain only images.'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'document': document_store.summary(document, document_owner())
+        }), 201
+    
+    except Exception as e:
+        logger.exception(f"Error storing document: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }), 500
+
+@app.route('/documents/<document_id>', methods=['GET'])
+def get_document(document_id):
+    """Return the stored summary (sections, skills, preview) for a document"""
+    record = document_store.get(document_id)
+    if record is None:
+        return document_not_found()
+    return jsonify({
+        'success': True,
+        'document': document_store.summary(record, document_owner())
     })
 
 @app.route('/test-gemini', methods=['GET'])
+@admission_controlled
 def test_gemini():
     """Test Gemini API connection"""
     try:
-        response = model.generate_content("explain the theory of relativity in simple terms.")
+        response = call_llm("explain the theory of relativity in simple terms.")
         return jsonify({
             'success': True,
             'message': response.text
         })
+    except (CircuitOpenError, BudgetExceeded) as e:
+        return llm_unavailable(e)
+    except AdmissionRejected:
+        raise
     except Exception as e:
         return jsonify({
             'success': False,
@@ -70,164 +656,133 @@ def test_gemini():
         }), 500
 
 @app.route('/analyze-cv', methods=['POST'])
+@admission_controlled
+@profiled_if_slow
 def analyze_cv():
     """
     Analyze CV using Gemini API.
     
-    Accepts file uploads from Laravel/Flutter and returns structured CV analysis.
+    Accepts file uploads from Laravel/Flutter (or a `document_id` from
+    POST /documents) and returns structured CV analysis.
     Validates if the document is actually a CV before analysis.
     
     Returns:
         JSON response with analysis results or error message
     """
     try:
-        # Check if file is in request
-        if 'file' not in request.files:
-            logger.warning("No file in request")
-            return jsonify({
-                'success': False,
-                'error': 'No file provided'
-            }), 400
-        
-        file = request.files['file']
+        # Resolve the CV from document_id or an uploaded file
+        document, error = load_cv_document('No file provided')
+        if error:
+            return error
+        cv_text = document['text']
         
-        if file.filename == '':
-            logger.warning("Empty filename")
+        if not cv_text or len(cv_text.strip()) < MIN_CV_TEXT_LENGTH:
+            logger.warning("Not enough text extracted from CV")
             return jsonify({
                 'success': False,
-                'error': 'No file selected'
+                'error': 'Could not extract enough text from the document. The file may be empty or contain only images.'
             }), 400
         
-        # Validate file format
-        if not validate_file_format(file.filename):
-            logger.warning(f"Unsupported file format: {file.filename}")
-            return jsonify({
-                'success': False,
-                'error': f'Unsupported file format. Please upload PDF or DOCX files.'
-            }), 400
+        logger.info(f"Extracted {len(cv_text)} characters from CV")
         
-        # Parse CV to extract text
-        parser = CVParser()
-        try:
-            cv_text = parser.extract_text(file)
-        except ValueError as e:
-            logger.error(f"Failed to extract text: {str(e)}")
-            return jsonify({
-                'success': False,
-                'error': str(e)
-            }), 400
+        # Reject obvious non-CVs locally; borderline documents go to the LLM for validation
+        if cv_gate:
+            decision, cv_score = cv_gate.decide(cv_text)
+            if decision == 'reject':
+                logger.warning(f"Document rejected by local CV gate (score {cv_score:.2f})")
+                return jsonify({
+                    'success': False,
+                    'error': 'Your document does not look like a CV',
+                    'details': 'Missing critical sections like experience, education, or contact information. Please upload a proper CV/Resume document.'
+                }), 400
         
-        if not cv_text or len(cv_text.strip()) < 50:
-            logger.warning("Not enough text extracted from CV")
+        # Stored documents keep their analysis for the current prompt version
+        cached_analysis, prompt_version = None, None
+        for result_key, prompt_version in ((ANALYZE_CV.fingerprint, ANALYZE_CV.fingerprint),
+                                           (DIFFED_ANALYSIS_KEY, REANALYZE_CV.fingerprint)):
+            cached_analysis = document_store.cached_result(document, result_key)
+            if cached_analysis:
+                break
+        if cached_analysis:
+            logger.info(f"Returning cached analysis for document {document['document_id']}")
             return jsonify({
-                'success': False,
-                'error': 'Could not extract enough text from the document. The file may be empty or contain only images.'
-            }), 400
+                'success': True,
+                'analysis': cached_analysis,
+                'cached': True,
+                'prompt_version': prompt_version,
+                'document_id': document['document_id'],
+                'cv_length': len(cv_text),
+                'cv_preview': cv_text[:200] + '...' if len(cv_text) > 200 else cv_text
+            })
         
-        logger.info(f"Extracted {len(cv_text)} characters from CV")
+        # Lightly edited copy of a stored CV: reuse its analysis, or update it from the diff
+        prompt = None
+        near_duplicate = None
+        near_duplicate_mode = str(request_param('near_duplicate') or NEAR_DUPLICATE_MODE).lower()
+        previous = find_previous_analysis(document) if near_duplicate_mode in ('reuse', 'diff') else None
+        if previous:
+            previous_record, previous_analysis, similarity = previous
+            near_duplicate = {'document_id': previous_record['document_id'], 'similarity': similarity}
+            changes = cv_changes(previous_record['text'], cv_text)
+            
+            if near_duplicate_mode == 'reuse' or not changes:
+                logger.info(f"Reusing analysis of near duplicate {previous_record['document_id'][:12]} ({similarity})")
+                near_duplicate['mode'] = 'reused'
+                # Not stored: it describes the other document, apart from the contact details
+                reused_analysis = dict(previous_analysis)
+                reused_analysis['extracted_sections'] = dict(previous_analysis.get('extracted_sections') or {},
+                                                             contact=local_analyzer.contact(cv_text))
+                return jsonify({
+                    'success': True,
+                    'analysis': reused_analysis,
+                    'near_duplicate': near_duplicate,
+                    'prompt_version': ANALYZE_CV.fingerprint,
+                    'document_id': document['document_id'],
+                    'cv_length': len(cv_text),
+                    'cv_preview': cv_text[:200] + '...' if len(cv_text) > 200 else cv_text
+                })
+            
+            # Only worth it when the diff is much smaller than the CV itself
+            if len(changes) < len(cv_text) // 2:
+                logger.info(f"Updating analysis of near duplicate {previous_record['document_id'][:12]} from {len(changes)} changed characters")
+                near_duplicate['mode'] = 'diffed'
+                prompt = REANALYZE_CV.render(previous_analysis=json.dumps(previous_analysis), changes=changes)
         
-        # Truncate cv_text to prevent exceeding API limits (max 15000 chars for analysis)
-        max_cv_length = 15000
-        if len(cv_text) > max_cv_length:
-            cv_text_for_analysis = cv_text[:max_cv_length] + "\n... [truncated due to length]"
-            logger.info(f"CV text truncated from {len(cv_text)} to {max_cv_length} characters")
-        else:
-            cv_text_for_analysis = cv_text
+        if prompt is None:
+            # Truncate cv_text to prevent exceeding API limits (max 15000 chars for analysis)
+            max_cv_length = 15000
+            if len(cv_text) > max_cv_length:
+                cv_text_for_analysis = cv_text[:max_cv_length] + "\n... [truncated due to length]"
+                logger.info(f"CV text truncated from {len(cv_text)} to {max_cv_length} characters")
+            else:
+                cv_text_for_analysis = cv_text
+            
+            # Static instructions first (cacheable model-side), then the document
+            prompt = ANALYZE_CV.render(cv_text=cv_text_for_analysis)
         
-        # Create enhanced prompt for CV validation and analysis
-        prompt = f"""
-You are an expert CV/Resume analyst. Analyze the following document and determine if it is a valid CV/Resume.
-
-DOCUMENT CONTENT:
-{cv_text_for_analysis}
-
-STEP 1 - VALIDATION:
-First, determine if this document is actually a CV/Resume. A valid CV should contain at least 3 of these sections:
-- Contact Information (name, email, phone, address)
-- Work Experience / Professional Experience
-- Education / Academic Background
-- Skills / Technical Skills / Competencies
-- Professional Summary / Objective / Profile
-
-If the document does NOT appear to be a CV/Resume (e.g., it's a random document, article, letter, or contains mostly irrelevant content), respond with ONLY this JSON:
-{{
-    "is_valid_cv": false,
-    "error": "Your document does not look like a CV",
-    "details": "Missing critical sections like experience, education, or contact information. Please upload a proper CV/Resume document."
-}}
-
-STEP 2 - ANALYSIS (only if it's a valid CV):
-If it IS a valid CV, analyze it thoroughly and provide this JSON structure:
-
-{{
-    "is_valid_cv": true,
-    "sections_found": ["contact", "experience", "education", "skills", "summary", "certifications", "interests", "projects"],
-    "missing_sections": ["list of important sections not found"],
-    "extracted_sections": {{
-        "contact": {{
-            "name": "extracted name or null",
-            "email": "extracted email or null",
-            "phone": "extracted phone or null",
-            "location": "extracted location or null",
-            "linkedin": "extracted linkedin or null"
-        }},
-        "background": "Professional summary/objective text if found, or null",
-        "experience": [
-            {{
-                "title": "job title",
-                "company": "company name",
-                "duration": "time period",
-                "description": "key responsibilities and achievements"
-            }}
-        ],
-        "education": [
-            {{
-                "degree": "degree name",
-                "institution": "school/university name",
-                "year": "graduation year or period",
-                "details": "additional details if any"
-            }}
-        ],
-        "skills": ["skill1", "skill2", "skill3"],
-        "certifications": ["certification1", "certification2"],
-        "interests": "interests/hobbies text if found, or null"
-    }},
-    "overall_score": 85,
-    "ats_compatibility_score": 75,
-    "strengths": [
-        "specific strength 1",
-        "specific strength 2",
-        "specific strength 3"
-    ],
-    "improvements": [
-        {{
-            "section": "section name",
-            "issue": "what's wrong or missing",
-            "suggestion": "specific actionable advice",
-            "priority": "high/medium/low"
-        }}
-    ],
-    "formatting_issues": ["list of formatting problems if any"],
-    "recommended_keywords": ["relevant keyword 1", "relevant keyword 2"]
-}}
-
-SCORING GUIDELINES:
-- Overall Score (0-100): Based on completeness, clarity, and professionalism
-- ATS Compatibility Score (0-100): Based on formatting, keyword usage, and structure
-
-Return ONLY valid JSON, no markdown formatting or code blocks.
-"""
+        deadline_error = check_llm_deadline()
+        if deadline_error:
+            return deadline_error
         
         # Call Gemini API
         logger.info("Calling Gemini API for CV analysis")
-        response = model.generate_content(prompt)
+        try:
+            response = call_llm(prompt, validate=is_json_response)
+        except (CircuitOpenError, BudgetExceeded) as e:
+            logger.warning(f"{e}; returning local heuristic analysis")
+            return jsonify({
+                'success': True,
+                'analysis': local_analyzer.analyze(cv_text),
+                'degraded': True,
+                'degraded_reason': degraded_reason(e),
+                'document_id': document['document_id'],
+                'cv_length': len(cv_text),
+                'cv_preview': cv_text[:200] + '...' if len(cv_text) > 200 else cv_text
+            })
         result_text = response.text
         
         # Clean up response - remove markdown code blocks if present
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
+        result_text = clean_json_response(result_text)
         
         # Parse JSON response
         try:
@@ -261,14 +816,22 @@ Return ONLY valid JSON, no markdown formatting or code blocks.
             analysis_data['ats_compatibility_score'] = 0
         
         logger.info(f"CV analysis complete. Score: {analysis_data.get('overall_score', 0)}")
+        # Diff-based updates are kept apart from full analyses, and expire with either template
+        document_store.store_result(
+            document, ANALYZE_CV.fingerprint if prompt.template is ANALYZE_CV else DIFFED_ANALYSIS_KEY, analysis_data)
         
         return jsonify({
             'success': True,
             'analysis': analysis_data,
+            'near_duplicate': near_duplicate,
+            'prompt_version': prompt.template.fingerprint,
+            'document_id': document['document_id'],
             'cv_length': len(cv_text),
             'cv_preview': cv_text[:200] + '...' if len(cv_text) > 200 else cv_text
         })
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.exception(f"Error analyzing CV: {str(e)}")
         return jsonify({
@@ -278,56 +841,102 @@ Return ONLY valid JSON, no markdown formatting or code blocks.
         }), 500
 
 @app.route('/generate-improvements', methods=['POST'])
+@admission_controlled
 def generate_improvements():
-    """Generate improved CV content based on suggestions"""
+    """
+    Generate improved CV content based on suggestions.
+    
+    With "mode": "patch", only the sections targeted by the improvements are
+    rewritten and returned as offset patches, along with the patched text.
+    """
     try:
         data = request.get_json()
         
+        # A stored document can be referenced instead of posting the full text
+        if data and 'cv_text' not in data and data.get('document_id'):
+            record = document_store.get(data['document_id'])
+            if record is None:
+                return document_not_found()
+            data['cv_text'] = record['text']
+        
         if not data or 'cv_text' not in data or 'improvements' not in data:
-            return jsonify({'error': 'Missing cv_text or improvements in request'}), 400
+            return jsonify({'error': 'Missing cv_text (or document_id) or improvements in request'}), 400
         
         cv_text = data['cv_text']
         improvements = data['improvements']
         
-        prompt = f"""
-You are a professional CV writer. Given this CV and improvement suggestions, rewrite the CV to be better.
-
-Original CV:
-{cv_text}
-
-Improvements to apply:
-{improvements}
-
-Instructions:
-1. Rewrite weak sections to be more impactful
-2. Add any critical missing sections with professional content
-3. Use action verbs and quantifiable achievements
-4. Ensure ATS-friendly formatting
-5. Keep it professional and concise
-
-Return the improved CV text in a clean, well-structured format.
-"""
+        # Patch mode: rewrite only the targeted sections and return offset patches
+        if data.get('mode') == 'patch':
+            plan = patch_generator.plan(cv_text, improvements)
+            if plan:
+                deadline_error = check_llm_deadline()
+                if deadline_error:
+                    return deadline_error
+                patched = generate_improvement_patches(cv_text, plan)
+                if patched is not None:
+                    return patched
+                logger.warning("Invalid patch response from the LLM; falling back to a full rewrite")
+            else:
+                logger.info("No improvement targets a known section; falling back to a full rewrite")
         
-        response = model.generate_content(prompt)
+        prompt = IMPROVE_CV.render(cv_text=cv_text, improvements=improvements)
+        
+        deadline_error = check_llm_deadline()
+        if deadline_error:
+            return deadline_error
+        
+        response = call_llm(prompt, validate=lambda response: bool(response.text.strip()))
         
         return jsonify({
             'success': True,
-            'improved_content': response.text
+            'improved_content': response.text,
+            'prompt_version': IMPROVE_CV.fingerprint
         })
         
+    except (CircuitOpenError, BudgetExceeded) as e:
+        return llm_unavailable(e)
+    except AdmissionRejected:
+        raise
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+def generate_improvement_patches(cv_text, plan):
+    """
+    Generate per-section replacement patches for /generate-improvements?mode=patch.
+    Returns None when the LLM's reply is not valid patch JSON.
+    """
+    prompt = patch_generator.build_prompt(cv_text, plan)
+    logger.info(f"Calling Gemini API for {len(plan['targets'])} section patch(es)")
+    response = call_llm(prompt)
+    
+    try:
+        patch_data = json.loads(clean_json_response(response.text))
+    except json.JSONDecodeError as e:
+        logger.warning(f"Failed to parse Gemini patch response: {str(e)}")
+        return None
+    
+    patches = patch_generator.parse_patches(cv_text, plan, patch_data)
+    if patches is None:
+        return None
+    return jsonify({
+        'success': True,
+        'mode': 'patch',
+        'patches': patches,
+        'improved_content': patch_generator.apply(cv_text, patches),
+        'prompt_version': prompt.template.fingerprint
+    })
+
 @app.route('/match-job', methods=['POST'])
+@admission_controlled
 def match_job():
     """
     Match CV against job description using Gemini AI.
     
-    Expected form data:
-    - file: CV file (PDF/DOCX)
+    Expected form data (or JSON when using document_id):
+    - file: CV file (PDF/DOC/DOCX), or document_id from POST /documents
     - job_description: Job posting text
     
     Returns:
@@ -344,25 +953,8 @@ def match_job():
     }
     """
     try:
-        # Check if file is in request
-        if 'file' not in request.files:
-            logger.warning("No file in request for job match")
-            return jsonify({
-                'success': False,
-                'error': 'No CV file provided'
-            }), 400
-        
-        file = request.files['file']
-        
-        if file.filename == '':
-            logger.warning("Empty filename for job match")
-            return jsonify({
-                'success': False,
-                'error': 'No file selected'
-            }), 400
-        
         # Check if job description is provided
-        job_description = request.form.get('job_description', '')
+        job_description = request_param('job_description', '') or ''
         if not job_description or len(job_description.strip()) < 50:
             logger.warning("Job description too short or missing")
             return jsonify({
@@ -370,26 +962,13 @@ def match_job():
                 'error': 'Job description must be at least 50 characters'
             }), 400
         
-        # Validate file format
-        if not validate_file_format(file.filename):
-            logger.warning(f"Unsupported file format for job match: {file.filename}")
-            return jsonify({
-                'success': False,
-                'error': 'Unsupported file format. Please upload PDF or DOCX files.'
-            }), 400
-        
-        # Parse CV to extract text
-        parser = CVParser()
-        try:
-            cv_text = parser.extract_text(file)
-        except ValueError as e:
-            logger.error(f"Failed to extract text for job match: {str(e)}")
-            return jsonify({
-                'success': False,
-                'error': str(e)
-            }), 400
+        # Resolve the CV from document_id or an uploaded file
+        document, error = load_cv_document('No CV file provided')
+        if error:
+            return error
+        cv_text = document['text']
         
-        if not cv_text or len(cv_text.strip()) < 50:
+        if not cv_text or len(cv_text.strip()) < MIN_CV_TEXT_LENGTH:
             logger.warning("Not enough text extracted from CV for job match")
             return jsonify({
                 'success': False,
@@ -398,6 +977,18 @@ def match_job():
         
         logger.info(f"Job Match: Extracted {len(cv_text)} characters from CV")
         
+        # Stored documents keep their match results per job description and prompt version
+        result_key = f"{MATCH_JOB.fingerprint}:{hashlib.sha256(job_description.encode('utf-8')).hexdigest()[:16]}"
+        cached_match = document_store.cached_result(document, result_key)
+        if cached_match:
+            logger.info(f"Returning cached job match for document {document['document_id']}")
+            return jsonify({
+                'success': True,
+                'match': cached_match,
+                'cached': True,
+                'prompt_version': MATCH_JOB.fingerprint
+            })
+        
         # Truncate texts to prevent exceeding API limits
         max_cv_length = 12000
         max_jd_length = 5000
@@ -415,54 +1006,31 @@ def match_job():
             job_description_for_analysis = job_description
         
         # Create Gemini prompt for job matching
-        prompt = f"""
-You are an expert career counselor and ATS specialist. Analyze how well this CV matches the job description.
-
-JOB DESCRIPTION:
-{job_description_for_analysis}
-
-CANDIDATE'S CV:
-{cv_text_for_analysis}
-
-Provide analysis as JSON:
-{{
-    "match_score": 85,
-    "verdict": "strong",
-    "matching_skills": ["Python", "React", "SQL"],
-    "missing_skills": ["AWS", "Docker"],
-    "suggestions": [
-        "Add AWS certification to strengthen cloud skills",
-        "Include Docker projects in your experience section",
-        "Quantify your achievements with metrics"
-    ],
-    "strengths": [
-        "5+ years Python experience matches senior requirement",
-        "React skills align with frontend needs",
-        "Strong database background"
-    ]
-}}
-
-Instructions:
-- match_score: 0-100 based on skills, experience, qualifications match
-- verdict: "strong" (80-100), "moderate" (60-79), "weak" (0-59)
-- matching_skills: Skills candidate HAS that job requires (list 5-15 skills)
-- missing_skills: Skills job requires but candidate lacks (list 3-10 skills)
-- suggestions: Specific, actionable CV improvements for THIS job (3-7 suggestions)
-- strengths: Candidate's strongest points for THIS role (3-5 strengths)
-
-Be honest but constructive. Return ONLY valid JSON, no markdown formatting or code blocks.
-"""
+        prompt = MATCH_JOB.render(
+            job_description=job_description_for_analysis,
+            cv_text=cv_text_for_analysis
+        )
+        
+        deadline_error = check_llm_deadline()
+        if deadline_error:
+            return deadline_error
         
         # Call Gemini API
         logger.info("Calling Gemini API for job matching")
-        response = model.generate_content(prompt)
+        try:
+            response = call_llm(prompt, validate=is_json_response)
+        except (CircuitOpenError, BudgetExceeded) as e:
+            logger.warning(f"{e}; returning local skill-overlap match")
+            return jsonify({
+                'success': True,
+                'match': local_analyzer.match(cv_text, job_description),
+                'degraded': True,
+                'degraded_reason': degraded_reason(e)
+            })
         result_text = response.text
         
         # Clean up response - remove markdown code blocks if present
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
+        result_text = clean_json_response(result_text)
         
         # Parse JSON response
         try:
@@ -508,12 +1076,16 @@ Be honest but constructive. Return ONLY valid JSON, no markdown formatting or co
         }
         
         logger.info(f"Job Match analysis complete. Score: {match_score}, Verdict: {verdict}")
+        document_store.store_result(document, result_key, result)
         
         return jsonify({
             'success': True,
-            'match': result
+            'match': result,
+            'prompt_version': MATCH_JOB.fingerprint
         })
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.exception(f"Error in job matching: {str(e)}")
         return jsonify({
@@ -522,6 +1094,175 @@ Be honest but constructive. Return ONLY valid JSON, no markdown formatting or co
             'error_type': type(e).__name__
         }), 500
 
+@app.route('/candidates', methods=['POST'])
+def index_candidate():
+    """
+    Add (or replace) a candidate in the search index.
+    
+    Expected form data (or JSON when using document_id/path):
+    - candidate_id: Caller's identifier for the candidate or CV
+    - file, document_id or path: The candidate's CV
+    """
+    try:
+        candidate_id = request_param('candidate_id')
+        if not candidate_id:
+            return jsonify({
+                'success': False,
+                'error': 'Missing candidate_id'
+            }), 400
+        
+        document, error = load_cv_document('No CV file provided')
+        if error:
+            return error
+        cv_text = document['text']
+        
+        if not cv_text or len(cv_text.strip()) < MIN_CV_TEXT_LENGTH:
+            return jsonify({
+                'success': False,
+                'error': 'Could not extract enough text from the CV.'
+            }), 400
+        
+        candidate_index.add(str(candidate_id), cv_text, document.get('skills'))
+        profile = profile_parser.parse(cv_text)
+        profile_table.add(str(candidate_id), profile)
+        return jsonify({
+            'success': True,
+            'candidate_id': str(candidate_id),
+            'document_id': document['document_id'],
+            'profile': profile,
+            'indexed_candidates': len(candidate_index)
+        }), 201
+    
+    except Exception as e:
+        logger.exception(f"Error indexing candidate: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }), 500
+
+@app.route('/candidates/<candidate_id>', methods=['DELETE'])
+def delete_candidate(candidate_id):
+    """Remove a candidate from the search index"""
+    profile_table.delete(candidate_id)
+    if not candidate_index.delete(candidate_id):
+        return jsonify({
+            'success': False,
+            'error': 'Candidate not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'candidate_id': candidate_id
+    })
+
+@app.route('/candidates/search', methods=['POST'])
+def search_candidates():
+    """
+    Find the best indexed candidates for a job description, without LLM calls.
+    
+    Expected JSON:
+    - job_description: Job posting text
+    - top_k: Number of candidates to return (default 20, max 200)
+    - skill_weight: Weight of skill overlap against text relevance (0-1, default 0.4)
+    - filters: Optional profile filters (as for /candidates/filter) applied before ranking
+    """
+    job_description = request_param('job_description', '') or ''
+    if not job_description.strip():
+        return jsonify({
+            'success': False,
+            'error': 'Missing job_description'
+        }), 400
+    
+    try:
+        top_k = max(1, min(200, int(request_param('top_k', 20))))
+        skill_weight = max(0.0, min(1.0, float(request_param('skill_weight', 0.4))))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'top_k and skill_weight must be numbers'
+        }), 400
+    
+    start = time.perf_counter()
+    candidate_ids = None
+    filters = request_param('filters')
+    if filters is not None:
+        filter_args, error = profile_filter_args(filters)
+        if error:
+            return error
+        candidate_ids = profile_table.matching_ids(**filter_args)
+    candidates = candidate_index.search(job_description, top_k, skill_weight, candidate_ids)
+    took_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Candidate search returned {len(candidates)} result(s) in {took_ms:.1f} ms")
+    
+    return jsonify({
+        'success': True,
+        'candidates': candidates,
+        'indexed_candidates': len(candidate_index),
+        'took_ms': round(took_ms, 2)
+    })
+
+def profile_filter_args(filters):
+    """
+    ProfileTable.filter arguments from a request's filters, or an error response.
+    `skills` may be a {skill: min_years} object or a list of required skills.
+    """
+    if not isinstance(filters, dict):
+        return None, (jsonify({'success': False, 'error': 'filters must be an object'}), 400)
+    try:
+        skills = filters.get('skills') or {}
+        if isinstance(skills, list):
+            skills = {skill: 0 for skill in skills}
+        filter_args = {
+            'min_years': float(filters.get('min_years') or 0),
+            'degree': filters.get('degree') or None,
+            'skills': {str(skill).lower(): float(years or 0) for skill, years in skills.items()}
+        }
+    except (AttributeError, TypeError, ValueError):
+        return None, (jsonify({
+            'success': False,
+            'error': 'min_years and skill years must be numbers'
+        }), 400)
+    if filter_args['degree'] is not None and filter_args['degree'] not in DEGREE_LEVELS:
+        return None, (jsonify({
+            'success': False,
+            'error': f"degree must be one of: {', '.join(DEGREE_LEVELS)}"
+        }), 400)
+    return filter_args, None
+
+@app.route('/candidates/filter', methods=['POST'])
+def filter_candidates():
+    """
+    Filter indexed candidates by their local experience profile, without LLM calls.
+    
+    Expected JSON:
+    - min_years: Minimum total years of experience
+    - degree: Minimum degree level (high_school, associate, bachelor, master, doctorate)
+    - skills: {"python": 3} minimum years per skill, or ["python"] to require the skills
+    - limit: Number of candidates to return (default 100, max 1000), most experienced first
+    """
+    data = request.get_json(silent=True) or {}
+    filter_args, error = profile_filter_args(data)
+    if error:
+        return error
+    try:
+        limit = max(1, min(1000, int(data.get('limit', 100))))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'limit must be a number'
+        }), 400
+    
+    start = time.perf_counter()
+    candidates, matched = profile_table.filter(limit=limit, **filter_args)
+    took_ms = (time.perf_counter() - start) * 1000
+    
+    return jsonify({
+        'success': True,
+        'candidates': candidates,
+        'matched': matched,
+        'took_ms': round(took_ms, 2)
+    })
+
 if __name__ == '__main__':
-    # Run the Flask app
+    # Run the Flask app (prefer serve.py, which spawned workers do not re-import)
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
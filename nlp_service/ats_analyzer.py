@@ -1,35 +1,40 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import re
+from rule_engine import RuleHits, get_rule_engine
 
 class ATSAnalyzer:
     """Analyze ATS (Applicant Tracking System) readability"""
     
-    def analyze(self, text: str) -> Dict[str, Any]:
-        """Analyze text for ATS compatibility"""
+    def analyze(self, text: str, hits: Optional[RuleHits] = None) -> Dict[str, Any]:
+        """
+        Analyze text for ATS compatibility.
+        Pass `hits` to reuse a rule scan shared with the other analyzers.
+        """
+        hits = hits or get_rule_engine().scan(text)
         score = 100
         issues = []
         recommendations = []
         
         # Check for complex formatting
-        if self._has_tables(text):
+        if self._has_tables(hits):
             score -= 15
             issues.append("Contains tables which may not be parsed correctly by ATS")
             recommendations.append("Convert tables to simple text format")
         
         # Check for graphics/images indicators
-        if self._has_graphics_indicators(text):
+        if self._has_graphics_indicators(hits):
             score -= 10
             issues.append("May contain graphics or images")
             recommendations.append("Remove graphics and images; use text only")
         
         # Check for standard section headers
-        if not self._has_standard_headers(text):
+        if not self._has_standard_headers(hits):
             score -= 15
             issues.append("Missing standard section headers")
             recommendations.append("Use clear section headers: Experience, Education, Skills")
         
         # Check keyword density
-        keyword_score = self._analyze_keyword_density(text)
+        keyword_score = self._analyze_keyword_density(hits)
         if keyword_score < 50:
             score -= 10
             issues.append("Low keyword density")
@@ -60,34 +65,25 @@ class ATSAnalyzer:
             'word_count': word_count
         }
     
-    def _has_tables(self, text: str) -> bool:
-        """Check if text might contain tables"""
-        # Simple heuristic: multiple consecutive spaces or tabs
-        return bool(re.search(r'  {3,}|\t{2,}', text))
+    def _has_tables(self, hits: RuleHits) -> bool:
+        """Check if text might contain tables ('layout' rules: runs of spaces or tabs)"""
+        return bool(hits.by_category('layout'))
     
-    def _has_graphics_indicators(self, text: str) -> bool:
-        """Check for graphics indicators"""
-        graphics_keywords = ['[image]', '[graphic]', '[chart]', '[logo]']
-        return any(keyword in text.lower() for keyword in graphics_keywords)
+    def _has_graphics_indicators(self, hits: RuleHits) -> bool:
+        """Check for graphics indicators ('graphics' rules)"""
+        return bool(hits.by_category('graphics'))
     
-    def _has_standard_headers(self, text: str) -> bool:
-        """Check for standard section headers"""
-        text_lower = text.lower()
-        required_headers = ['experience', 'education', 'skills']
-        return all(header in text_lower for header in required_headers)
+    def _has_standard_headers(self, hits: RuleHits) -> bool:
+        """Check for standard section headers: every 'standard_header' rule matched"""
+        required_headers = {rule.id for rule in hits.rules('standard_header')}
+        return required_headers <= hits.rule_ids('standard_header')
     
-    def _analyze_keyword_density(self, text: str) -> int:
-        """Analyze keyword density (0-100)"""
-        text_lower = text.lower()
-        
-        # Common professional keywords
-        keywords = [
-            'managed', 'developed', 'created', 'implemented', 'designed',
-            'led', 'coordinated', 'achieved', 'improved', 'increased',
-            'reduced', 'analyzed', 'collaborated', 'delivered', 'executed'
-        ]
-        
-        found = sum(1 for keyword in keywords if keyword in text_lower)
+    def _analyze_keyword_density(self, hits: RuleHits) -> int:
+        """Analyze keyword density (0-100): share of 'action_verb' rules used at least once"""
+        keywords = hits.rules('action_verb')
+        if not keywords:
+            return 0
+        found = len(hits.rule_ids('action_verb'))
         return min(100, (found / len(keywords)) * 100)
     
     def _has_consistent_formatting(self, text: str) -> bool:
@@ -0,0 +1,201 @@
+import argparse
+import json
+import math
+import os
+import re
+import random
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from cv_parser import CVParser
+from prompts import ANALYZE_CV
+from section_detector import SectionDetector
+
+WORD_PATTERN = re.compile(r"[a-z][a-z+#.\-]*")
+YEAR_PATTERN = re.compile(r'\b(?:19|20)\d{2}\b')
+
+# Trained on fixtures/cv_gate.jsonl, evaluated on fixtures/cv_gate_holdout.jsonl
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'cv_gate.json')
+
+# Prior weights for structural signals, used when no model is loaded (model_path=None).
+# On fixtures/cv_gate.jsonl they reject no CVs but only 5 of 16 non-CVs.
+DEFAULT_WEIGHTS = {
+    'bias': -3.0,
+    'required_sections': 6.0,
+    'optional_sections': 1.0,
+    'has_email': 1.5,
+    'has_phone': 1.0,
+    'year_mentions': 1.0,
+}
+
+# Prompt template overhead (instructions + JSON schema) added to every /analyze-cv call
+PROMPT_OVERHEAD_CHARS = len(ANALYZE_CV.prefix)
+
+
+class CVClassifier:
+    """
+    Fast local gate that rejects obvious non-CVs before any LLM call.
+
+    Combines structural signals (SectionDetector sections, contact hits, year
+    mentions) with a logistic model over hashed word unigrams and bigrams.
+    Documents scoring below `reject_below` are rejected locally; everything
+    else is forwarded to the LLM, which makes the final validity call.
+    """
+
+    def __init__(self, model_path: Optional[str] = DEFAULT_MODEL_PATH, reject_below: float = 0.15,
+                 n_features: int = 2 ** 18):
+        self.reject_below = reject_below
+        self.n_features = n_features
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.hashed_weights: Dict[int, float] = {}
+        self._section_detector = SectionDetector()
+        self._parser = CVParser(layout_aware=False)
+        if model_path:
+            self.load(model_path)
+
+    def features(self, text: str) -> Tuple[Dict[str, float], List[int]]:
+        """Structural features and hashed n-gram feature indices"""
+        sections = self._section_detector.detect(text)
+        required = self._section_detector.required_sections
+        contact = self._parser._extract_contact(text)
+
+        structural = {
+            'required_sections': sum(sections[name] for name in required) / len(required),
+            'optional_sections': sum(
+                sections[name] for name in self._section_detector.optional_sections) / len(
+                self._section_detector.optional_sections),
+            'has_email': 1.0 if 'email' in contact else 0.0,
+            'has_phone': 1.0 if 'phone' in contact else 0.0,
+            'year_mentions': min(1.0, len(YEAR_PATTERN.findall(text)) / 4),
+        }
+
+        words = WORD_PATTERN.findall(text.lower())
+        grams = set(words)
+        grams.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        hashed = sorted({zlib.crc32(gram.encode('utf-8')) % self.n_features for gram in grams})
+        return structural, hashed
+
+    def score(self, text: str) -> float:
+        """Probability (0-1) that the text is a CV"""
+        return self._probability(*self.features(text))
+
+    def decide(self, text: str) -> Tuple[str, float]:
+        """Return ('reject' | 'forward', score)"""
+        score = self.score(text)
+        return ('reject' if score < self.reject_below else 'forward'), score
+
+    def _probability(self, structural: Dict[str, float], hashed: List[int]) -> float:
+        z = self.weights['bias']
+        z += sum(self.weights.get(name, 0.0) * value for name, value in structural.items())
+        if self.hashed_weights and hashed:
+            # Average so long documents don't dominate the structural signals
+            z += sum(self.hashed_weights.get(i, 0.0) for i in hashed) / math.sqrt(len(hashed))
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+
+    def train(self, samples: List[Tuple[str, bool]], epochs: int = 10, learning_rate: float = 0.1,
+              l2: float = 1e-4, seed: int = 0):
+        """Fit all weights with SGD logistic regression on (text, is_cv) samples"""
+        data = [(self.features(text), 1.0 if is_cv else 0.0) for text, is_cv in samples]
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(data)
+            for (structural, hashed), label in data:
+                gradient = self._probability(structural, hashed) - label
+                self.weights['bias'] -= learning_rate * gradient
+                for name, value in structural.items():
+                    self.weights[name] -= learning_rate * (gradient * value + l2 * self.weights[name])
+                scale = 1.0 / math.sqrt(len(hashed)) if hashed else 0.0
+                for i in hashed:
+                    weight = self.hashed_weights.get(i, 0.0)
+                    self.hashed_weights[i] = weight - learning_rate * (gradient * scale + l2 * weight)
+
+    def evaluate(self, samples: List[Tuple[str, bool]]) -> Dict[str, Any]:
+        """
+        Precision/recall of local rejection on labeled samples, plus LLM cost saved.
+
+        'Positive' means rejected as a non-CV. Saved tokens are the prompt
+        tokens of every correctly rejected document.
+        """
+        true_rejects = false_rejects = missed_rejects = forwarded = 0
+        tokens_saved = 0
+        elapsed = 0.0
+        for text, is_cv in samples:
+            start = time.perf_counter()
+            decision, _ = self.decide(text)
+            elapsed += time.perf_counter() - start
+            if decision == 'reject':
+                if is_cv:
+                    false_rejects += 1
+                else:
+                    true_rejects += 1
+                    tokens_saved += (len(text) + PROMPT_OVERHEAD_CHARS) // 4
+            else:
+                forwarded += 1
+                if not is_cv:
+                    missed_rejects += 1
+
+        rejected = true_rejects + false_rejects
+        non_cvs = true_rejects + missed_rejects
+        return {
+            'samples': len(samples),
+            'precision': true_rejects / rejected if rejected else 1.0,
+            'recall': true_rejects / non_cvs if non_cvs else 1.0,
+            'rejected_locally': rejected,
+            'false_rejects': false_rejects,
+            'forwarded_to_llm': forwarded,
+            'llm_calls_saved': true_rejects,
+            'estimated_input_tokens_saved': tokens_saved,
+            'avg_decision_ms': elapsed * 1000 / len(samples) if samples else 0.0,
+        }
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({
+                'n_features': self.n_features,
+                'weights': self.weights,
+                'hashed_weights': {str(i): round(w, 6) for i, w in self.hashed_weights.items() if abs(w) > 1e-6},
+            }, f)
+
+    def load(self, path: str):
+        with open(path) as f:
+            model = json.load(f)
+        self.n_features = model['n_features']
+        self.weights.update(model['weights'])
+        self.hashed_weights = {int(i): w for i, w in model['hashed_weights'].items()}
+
+
+def load_samples(path: str) -> List[Tuple[str, bool]]:
+    """Read labeled JSONL: one {"text": ..., "is_cv": true|false} per line"""
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row['text'], bool(row['is_cv'])) for row in rows]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train and evaluate the local CV-validity gate')
+    commands = parser.add_subparsers(dest='command', required=True)
+    train_cmd = commands.add_parser('train', help='fit a model on labeled JSONL and save it')
+    train_cmd.add_argument('samples', help='labeled JSONL, one {"text": ..., "is_cv": ...} per line')
+    train_cmd.add_argument('model', help='where to write the trained model')
+    train_cmd.add_argument('--holdout', help='labeled JSONL to report on instead of the training samples')
+    for name, description in (('evaluate', 'print the rejection report'),
+                              ('check', 'print the report and fail if any labeled CV is rejected')):
+        command = commands.add_parser(name, help=description)
+        command.add_argument('samples', help='labeled JSONL, one {"text": ..., "is_cv": ...} per line')
+        command.add_argument('model', nargs='?', default=DEFAULT_MODEL_PATH,
+                             help='trained model (default: models/cv_gate.json)')
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if args.command == 'train':
+        classifier = CVClassifier(model_path=None)
+        classifier.train(samples)
+        classifier.save(args.model)
+        report = classifier.evaluate(load_samples(args.holdout) if args.holdout else samples)
+    else:
+        classifier = CVClassifier(model_path=args.model)
+        report = classifier.evaluate(samples)
+    print(json.dumps(report, indent=2))
+    if args.command == 'check' and report['false_rejects']:
+        sys.exit(f"{report['false_rejects']} labeled CVs would be rejected")
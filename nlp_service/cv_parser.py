@@ -1,15 +1,41 @@
 import re
 import io
+import mmap
 import tempfile
 import os
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Optional, Union
 import PyPDF2
-import docx
 import pdfplumber
+from docx_extractor import DocxExtractor
+from entity_extractor import EntityExtractor
+from section_detector import SectionDetector
+from doc_converter import get_doc_converter
+from pdf_ocr import get_pdf_ocr, page_fingerprint
+from layout_extractor import LayoutExtractor
+from shared_ingest import MappedFileReader
+
+ZIP_MAGIC = b'PK\x03\x04'
+
+# Header keywords of the experience and education sections
+EXPERIENCE_KEYWORDS = ['experience', 'work history', 'employment']
+EDUCATION_KEYWORDS = ['education', 'academic', 'qualifications']
 
 class CVParser:
     """Parse PDF/DOCX files and extract structured data"""
     
+    def __init__(self, layout_aware: Optional[bool] = None):
+        """
+        Args:
+            layout_aware: Use column-aware PDF extraction. Defaults to the
+                PDF_LAYOUT_MODE environment variable ('columns' or 'plain').
+        """
+        if layout_aware is None:
+            layout_aware = os.getenv('PDF_LAYOUT_MODE', 'plain').lower() == 'columns'
+        self.layout_aware = layout_aware
+        self._layout_extractor = LayoutExtractor() if layout_aware else None
+        self._entity_extractor = EntityExtractor()
+        self._section_detector = SectionDetector()
+    
     def parse(self, file_path: str) -> Dict[str, Any]:
         """Parse CV file and extract structured data"""
         text = self._extract_text(file_path)
@@ -23,7 +49,7 @@ class CVParser:
     
     def extract_text(self, file_obj) -> str:
         """
-        Extract text from a Flask file object (PDF or DOCX).
+        Extract text from a Flask file object (PDF, DOC or DOCX).
         Handles file uploads directly from request without saving to disk permanently.
         
         Args:
@@ -50,56 +76,114 @@ class CVParser:
         except Exception as e:
             raise ValueError(f"Failed to read file: {str(e)}")
         
+        return self.extract_text_from_bytes(file_content, filename)
+    
+    def extract_text_from_bytes(self, file_content: bytes, filename: str) -> str:
+        """
+        Extract text from file content already read into memory.
+        
+        Args:
+            file_content: Raw file bytes, or a read-only mmap of the file
+            filename: Original filename, used to pick the format by extension
+            
+        Returns:
+            str: Extracted text from the document
+            
+        Raises:
+            ValueError: If file format is unsupported or file is corrupted/unreadable
+        """
+        filename = filename.lower()
+        
         if len(file_content) == 0:
             raise ValueError("File is empty")
         
         # Handle based on file extension
         if filename.endswith('.pdf'):
             return self._extract_pdf_from_bytes(file_content)
-        elif filename.endswith(('.doc', '.docx')):
+        elif filename.endswith('.docx'):
             return self._extract_docx_from_bytes(file_content)
+        elif filename.endswith('.doc'):
+            return self._extract_doc_from_bytes(file_content)
         else:
-            raise ValueError(f"Unsupported file format. Please upload PDF or DOCX files. Got: {filename}")
+            raise ValueError(f"Unsupported file format. Please upload PDF, DOC or DOCX files. Got: {filename}")
+    
+    def _as_stream(self, file_content: Union[bytes, mmap.mmap]):
+        """Seekable stream over file content; mmaps are read in place without copying"""
+        if isinstance(file_content, mmap.mmap):
+            return MappedFileReader(file_content)
+        return io.BytesIO(file_content)
     
     def _extract_pdf_from_bytes(self, file_content: bytes) -> str:
-        """Extract text from PDF bytes using pdfplumber with PyPDF2 fallback"""
-        text = ""
+        """Extract text from PDF bytes using pdfplumber with PyPDF2 fallback and OCR for scanned pages"""
+        page_texts = []
+        scanned_pages = {}
         
         # Try pdfplumber first
         try:
-            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            with self._as_stream(file_content) as stream, pdfplumber.open(stream) as pdf:
+                for index, page in enumerate(pdf.pages):
+                    if self._layout_extractor:
+                        page_text = self._layout_extractor.extract_page(page)
+                    else:
+                        page_text = page.extract_text()
+                    if page_text and page_text.strip():
+                        page_texts.append(page_text)
+                        continue
+                    page_texts.append('')
+                    # No text layer: remember image-only pages for OCR
+                    fingerprint = page_fingerprint(page)
+                    if fingerprint:
+                        scanned_pages[index] = fingerprint
         except Exception:
             # Fallback to PyPDF2
+            page_texts = []
+            scanned_pages = {}
             try:
-                reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+                with self._as_stream(file_content) as stream:
+                    reader = PyPDF2.PdfReader(stream)
+                    for page in reader.pages:
+                        page_text = page.extract_text()
+                        if page_text:
+                            page_texts.append(page_text)
             except Exception as e:
                 raise ValueError(f"Failed to extract text from PDF. The file may be corrupted or password-protected: {str(e)}")
         
-        return text.strip()
+        ocr = get_pdf_ocr() if scanned_pages else None
+        if ocr:
+            for index, ocr_text in ocr.ocr_pages(file_content, scanned_pages).items():
+                page_texts[index] = ocr_text
+        
+        return '\n'.join(text for text in page_texts if text).strip()
     
     def _extract_docx_from_bytes(self, file_content: bytes) -> str:
-        """Extract text from DOCX bytes"""
+        """Extract text from DOCX bytes, including tables, headers/footers and text boxes"""
         try:
-            doc = docx.Document(io.BytesIO(file_content))
-            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-            return '\n'.join(paragraphs)
+            with self._as_stream(file_content) as stream:
+                return DocxExtractor().extract(stream)
         except Exception as e:
             raise ValueError(f"Failed to extract text from DOCX. The file may be corrupted: {str(e)}")
     
+    def _extract_doc_from_bytes(self, file_content: bytes) -> str:
+        """Extract text from legacy Word 97-2003 (.doc) bytes using the converter pool"""
+        # DOCX files renamed to .doc are common; they are zip packages
+        if file_content[:len(ZIP_MAGIC)] == ZIP_MAGIC:
+            return self._extract_docx_from_bytes(file_content)
+        try:
+            return get_doc_converter().extract(file_content)
+        except TimeoutError:
+            raise ValueError("Timed out extracting text from DOC. Please try again or upload a DOCX/PDF version.")
+        except Exception as e:
+            raise ValueError(f"Failed to extract text from DOC. The file may be corrupted or password-protected: {str(e)}")
+    
     def _extract_text(self, file_path: str) -> str:
-        """Extract text from PDF or DOCX file (legacy method for file paths)"""
+        """Extract text from PDF, DOC or DOCX file (legacy method for file paths)"""
         if file_path.endswith('.pdf'):
             return self._extract_pdf_text(file_path)
-        elif file_path.endswith(('.doc', '.docx')):
+        elif file_path.endswith('.docx'):
             return self._extract_docx_text(file_path)
+        elif file_path.endswith('.doc'):
+            with open(file_path, 'rb') as file:
+                return self._extract_doc_from_bytes(file.read())
         else:
             raise ValueError("Unsupported file format")
     
@@ -123,40 +207,19 @@ class CVParser:
     
     def _extract_docx_text(self, file_path: str) -> str:
         """Extract text from DOCX"""
-        doc = docx.Document(file_path)
-        return '\n'.join([para.text for para in doc.paragraphs])
+        with open(file_path, 'rb') as file:
+            return DocxExtractor().extract(file)
     
     def _extract_contact(self, text: str) -> Dict[str, str]:
-        """Extract contact information"""
-        contact = {}
-        
-        # Extract email
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        if emails:
-            contact['email'] = emails[0]
-        
-        # Extract phone
-        phone_pattern = r'[\+\(]?[1-9][0-9 .\-\(\)]{8,}[0-9]'
-        phones = re.findall(phone_pattern, text)
-        if phones:
-            contact['phone'] = phones[0]
-        
-        # Extract name (first line typically)
-        lines = text.split('\n')
-        for line in lines[:5]:
-            if line.strip() and len(line.strip()) < 50:
-                contact['name'] = line.strip()
-                break
-        
-        return contact
+        """Extract contact information (email, phone, linkedin, website, name), header region first"""
+        return self._entity_extractor.extract_contact(text)
     
     def _extract_experience(self, text: str) -> List[Dict[str, str]]:
         """Extract work experience"""
         experience = []
         
         # Look for experience section
-        exp_section = self._find_section(text, ['experience', 'work history', 'employment'])
+        exp_section = self._find_section(text, EXPERIENCE_KEYWORDS)
         
         if exp_section:
             # Simple extraction: split by bullet points or line breaks
@@ -174,7 +237,7 @@ class CVParser:
         education = []
         
         # Look for education section
-        edu_section = self._find_section(text, ['education', 'academic', 'qualifications'])
+        edu_section = self._find_section(text, EDUCATION_KEYWORDS)
         
         if edu_section:
             entries = re.split(r'\n(?=[•\-\*]|\d+\.)', edu_section)
@@ -189,33 +252,19 @@ class CVParser:
     def _find_section(self, text: str, keywords: List[str]) -> str:
         """Find a section in the text based on keywords"""
         lines = text.split('\n')
-        section_start = -1
-        
-        for i, line in enumerate(lines):
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in keywords):
-                section_start = i
-                break
         
-        if section_start == -1:
+        # Only header lines start or end a section, so "6 years of experience" in a summary does not
+        section_start = next((i for i, line in enumerate(lines)
+                              if self._section_detector.header_section(line)
+                              and any(keyword in line.lower() for keyword in keywords)), None)
+        if section_start is None:
             return ""
         
         # Extract until next section or end
         section_lines = []
-        for i in range(section_start + 1, len(lines)):
-            line = lines[i]
-            # Check if we hit another section header
-            if self._is_section_header(line):
+        for line in lines[section_start + 1:]:
+            if self._section_detector.header_section(line):
                 break
             section_lines.append(line)
         
         return '\n'.join(section_lines)
-    
-    def _is_section_header(self, line: str) -> bool:
-        """Check if a line is likely a section header"""
-        line_lower = line.lower().strip()
-        headers = [
-            'experience', 'education', 'skills', 'summary', 'objective',
-            'certifications', 'awards', 'projects', 'publications'
-        ]
-        return any(header in line_lower for header in headers) and len(line.strip()) < 50
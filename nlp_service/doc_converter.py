@@ -0,0 +1,140 @@
+import hashlib
+import io
+import os
+import re
+import struct
+import threading
+import olefile
+from result_cache import ResultCache
+from worker_pool import WorkerPool
+
+# Word 97-2003 File Information Block (FIB) offsets
+FIB_MAGIC = 0xA5EC
+FIB_FLAGS_OFFSET = 0x000A
+FIB_CCP_TEXT_OFFSET = 0x004C
+FIB_FC_CLX_OFFSET = 0x01A2
+FLAG_ENCRYPTED = 0x0100
+FLAG_WHICH_TABLE = 0x0200
+FC_COMPRESSED = 0x40000000
+
+FIELD_WITH_RESULT = re.compile(r'\x13[^\x13\x14\x15]*\x14([^\x13\x14\x15]*)\x15')
+FIELD_WITHOUT_RESULT = re.compile(r'\x13[^\x13\x14\x15]*\x15')
+CONTROL_CHARS = re.compile(r'[\x00-\x08\x0e-\x1f]')
+
+
+def extract_doc_text(file_content: bytes) -> str:
+    """
+    Extract the main document text from a Word 97-2003 binary (.doc) file.
+
+    Reads the piece table (CLX) from the table stream and decodes each piece
+    as cp1252 (compressed) or UTF-16LE. Runs inside a WorkerPool process.
+    """
+    if not olefile.isOleFile(io.BytesIO(file_content)):
+        raise ValueError("Not a Word 97-2003 document")
+
+    with olefile.OleFileIO(io.BytesIO(file_content)) as ole:
+        if not ole.exists('WordDocument'):
+            raise ValueError("Not a Word 97-2003 document")
+        word = ole.openstream('WordDocument').read()
+
+        magic, = struct.unpack_from('<H', word, 0)
+        if magic != FIB_MAGIC:
+            raise ValueError("Unrecognized Word document header")
+        flags, = struct.unpack_from('<H', word, FIB_FLAGS_OFFSET)
+        if flags & FLAG_ENCRYPTED:
+            raise ValueError("Document is password-protected")
+
+        table_name = '1Table' if flags & FLAG_WHICH_TABLE else '0Table'
+        table = ole.openstream(table_name).read()
+
+    ccp_text, = struct.unpack_from('<i', word, FIB_CCP_TEXT_OFFSET)
+    fc_clx, lcb_clx = struct.unpack_from('<II', word, FIB_FC_CLX_OFFSET)
+    clx = table[fc_clx:fc_clx + lcb_clx]
+
+    # Skip property modifiers (Prc) to reach the piece table (Pcdt)
+    pos = 0
+    while pos < len(clx) and clx[pos] == 0x01:
+        cb_grpprl, = struct.unpack_from('<h', clx, pos + 1)
+        pos += 3 + cb_grpprl
+    if pos >= len(clx) or clx[pos] != 0x02:
+        raise ValueError("Document piece table not found")
+
+    lcb, = struct.unpack_from('<I', clx, pos + 1)
+    plc = clx[pos + 5:pos + 5 + lcb]
+    pieces = (lcb - 4) // 12
+    cps = struct.unpack_from(f'<{pieces + 1}I', plc, 0)
+
+    parts = []
+    for i in range(pieces):
+        start_cp, end_cp = cps[i], min(cps[i + 1], ccp_text)
+        if start_cp >= end_cp:
+            break
+        fc, = struct.unpack_from('<I', plc, (pieces + 1) * 4 + i * 8 + 2)
+        count = end_cp - start_cp
+        if fc & FC_COMPRESSED:
+            offset = (fc & ~FC_COMPRESSED) // 2
+            parts.append(word[offset:offset + count].decode('cp1252', errors='replace'))
+        else:
+            parts.append(word[fc:fc + 2 * count].decode('utf-16-le', errors='replace'))
+
+    return _clean_text(''.join(parts))
+
+
+def _clean_text(text: str) -> str:
+    """Resolve field codes and map Word control characters to plain text"""
+    previous = None
+    while previous != text:
+        previous = text
+        text = FIELD_WITH_RESULT.sub(r'\1', text)
+        text = FIELD_WITHOUT_RESULT.sub('', text)
+
+    # Cells end with \x07 and rows with an extra \x07 mark
+    text = text.replace('\x07\x07', '\n').replace('\x07', ' | ')
+    text = text.replace('\r', '\n').replace('\x0b', '\n').replace('\x0c', '\n').replace('\x1e', '-')
+    text = CONTROL_CHARS.sub('', text)
+
+    lines = [line.strip() for line in text.split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+
+class DocConverter:
+    """Convert legacy .doc files in a warm worker pool, caching results by content hash"""
+
+    def __init__(self, workers: int = 2, timeout: float = 20, memory_limit_mb: int = 512,
+                 cache_size: int = 256):
+        self.timeout = timeout
+        self._pool = WorkerPool(size=workers, memory_limit_mb=memory_limit_mb)
+        self._cache = ResultCache(max_entries=cache_size)
+
+    def extract(self, file_content: bytes) -> str:
+        """
+        Extract text from .doc bytes.
+
+        Raises:
+            TimeoutError: If conversion exceeds the configured timeout
+            RuntimeError: If the document could not be parsed
+        """
+        key = hashlib.sha256(file_content).hexdigest()
+        text = self._cache.get(key)
+        if text is None:
+            text = self._pool.run(extract_doc_text, (bytes(file_content),), self.timeout)
+            self._cache.set(key, text)
+        return text
+
+
+_doc_converter = None
+_doc_converter_lock = threading.Lock()
+
+
+def get_doc_converter() -> DocConverter:
+    """Shared converter configured from the environment (created on first use)"""
+    global _doc_converter
+    with _doc_converter_lock:
+        if _doc_converter is None:
+            _doc_converter = DocConverter(
+                workers=int(os.getenv('DOC_CONVERTER_WORKERS', '2')),
+                timeout=float(os.getenv('DOC_CONVERTER_TIMEOUT', '20')),
+                memory_limit_mb=int(os.getenv('DOC_CONVERTER_MEMORY_MB', '512')),
+                cache_size=int(os.getenv('DOC_CONVERTER_CACHE_SIZE', '256')),
+            )
+        return _doc_converter
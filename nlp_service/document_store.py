@@ -0,0 +1,92 @@
+import hashlib
+import time
+from typing import Any, Dict, List, Optional
+from keyword_extractor import KeywordExtractor
+from near_duplicate import NearDuplicateIndex
+from result_cache import ResultCache
+from section_detector import SectionDetector
+
+
+class DocumentStore:
+    """
+    Upload-once store of parsed CVs.
+
+    A document is extracted and parsed once, then referenced by its
+    `document_id` (the SHA-256 of the file content) from every route instead of
+    re-uploading the file or posting the raw text. Entries are evicted LRU and
+    expire after `ttl_seconds`. With a `near_duplicates` index, each new record
+    lists the stored documents whose text is nearly identical. A document id
+    is all it takes to read a record, so near duplicates are only ever shown
+    to a tenant that uploaded them too.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: Optional[float] = 3600,
+                 near_duplicates: Optional[NearDuplicateIndex] = None):
+        self._cache = ResultCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._near_duplicates = near_duplicates
+        self._section_detector = SectionDetector()
+        self._keyword_extractor = KeywordExtractor()
+
+    @staticmethod
+    def content_hash(file_content: bytes) -> str:
+        """Document id for the given file content"""
+        return hashlib.sha256(file_content).hexdigest()
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored record, or None if unknown or expired"""
+        return self._cache.get(document_id)
+
+    def add(self, document_id: str, text: str, filename: str, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Parse extracted text into a compact record and store it, owned by `tenant` if given"""
+        record = {
+            'document_id': document_id,
+            'filename': filename,
+            'tenants': {tenant} if tenant else set(),
+            'text': text,
+            'char_count': len(text),
+            'sections': self._section_detector.segment(text),
+            'skills': self._keyword_extractor.extract(text),
+            'near_duplicates': self._near_duplicates.add(document_id, text) if self._near_duplicates is not None else [],
+            'created_at': time.time(),
+        }
+        self._cache.set(document_id, record)
+        return record
+
+    @staticmethod
+    def add_tenant(record: Dict[str, Any], tenant: Optional[str]):
+        """Record that `tenant` uploaded an already stored document too"""
+        if tenant:
+            record.setdefault('tenants', set()).add(tenant)
+
+    def near_duplicates(self, record: Dict[str, Any], tenant: Optional[str]) -> List[Dict[str, Any]]:
+        """Stored near duplicates of a record that `tenant` uploaded (none without a tenant)"""
+        if not tenant:
+            return []
+        matches = []
+        for match in record.get('near_duplicates', []):
+            other = self.get(match['document_id'])
+            if other is not None and tenant in other.get('tenants', ()):
+                matches.append(match)
+        return matches
+
+    def cached_result(self, record: Dict[str, Any], key: str) -> Optional[Dict[str, Any]]:
+        """LLM result stored on the record under `key` (which includes the prompt fingerprint)"""
+        return record.get('results', {}).get(key)
+
+    def store_result(self, record: Dict[str, Any], key: str, result: Dict[str, Any]):
+        """Keep an LLM result with the record, so it expires and is evicted along with it"""
+        if record.get('document_id'):
+            record.setdefault('results', {})[key] = result
+
+    def summary(self, record: Dict[str, Any], tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Public view of a record for `tenant` (everything except the full text)"""
+        text = record['text']
+        return {
+            'document_id': record['document_id'],
+            'filename': record['filename'],
+            'char_count': record['char_count'],
+            'sections': record['sections'],
+            'skills': record['skills'],
+            'near_duplicates': self.near_duplicates(record, tenant),
+            'cv_preview': text[:200] + '...' if len(text) > 200 else text,
+        }
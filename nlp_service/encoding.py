@@ -0,0 +1,281 @@
+import gzip
+import io
+import json
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional
+from flask import Request, Response, current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional accelerators: everything works without them, only slower or with fewer encodings
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+# Leave datetimes and dataclasses to Flask's default() so output matches the stdlib encoder
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                  | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson is not None else 0
+COMPRESSIBLE_MIMETYPES = frozenset({'application/json', 'text/plain', 'text/html'} | set(MSGPACK_MIMETYPES))
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def available_encodings() -> Dict[str, bool]:
+    return {'orjson': orjson is not None, 'msgpack': msgpack is not None, 'zstd': zstandard is not None}
+
+
+def wants_msgpack() -> bool:
+    """Whether the client explicitly accepts MessagePack at least as much as JSON (not via */*)"""
+    if msgpack is None or not has_request_context():
+        return False
+    accept = request.accept_mimetypes
+    quality = max((quality for value, quality in accept if value in MSGPACK_MIMETYPES), default=0)
+    return quality > 0 and quality >= accept['application/json']
+
+
+class NegotiatingJSONProvider(DefaultJSONProvider):
+    """
+    Response serializer for jsonify.
+
+    Bodies are always compact (never indented, even in debug mode) and use
+    orjson when it is installed. Clients sending `Accept: application/msgpack`
+    get the same payload as MessagePack instead.
+    """
+
+    compact = True
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        if wants_msgpack():
+            response = self._app.response_class(
+                msgpack.packb(obj, default=self.default, use_bin_type=True), mimetype=MSGPACK_MIMETYPES[0])
+        elif orjson is not None:
+            response = self._app.response_class(
+                orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS), mimetype=self.mimetype)
+        else:
+            response = self._app.response_class(
+                json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii, separators=(',', ':')),
+                mimetype=self.mimetype)
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
+
+
+def response_payload(response: Response) -> Any:
+    """Decoded JSON or MessagePack body of an (uncompressed) response, None for other bodies"""
+    if msgpack is not None and response.mimetype in MSGPACK_MIMETYPES:
+        return msgpack.unpackb(response.get_data(), raw=False)
+    return response.get_json(silent=True)
+
+
+def set_response_payload(response: Response, data: Any):
+    """Replace a response body, keeping its JSON or MessagePack encoding"""
+    if msgpack is not None and response.mimetype in MSGPACK_MIMETYPES:
+        response.set_data(msgpack.packb(data, use_bin_type=True))
+    else:
+        response.set_data(current_app.json.dumps(data))
+
+
+class MessagePackRequest(Request):
+    """Request whose get_json() (and request.json) also decodes MessagePack bodies"""
+
+    def get_json(self, force: bool = False, silent: bool = False, cache: bool = True) -> Any:
+        if msgpack is None or self.mimetype not in MSGPACK_MIMETYPES:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        if hasattr(self, '_msgpack_body'):
+            return self._msgpack_body
+        try:
+            data = msgpack.unpackb(self.get_data(cache=cache), raw=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            if silent:
+                return None
+            return self.on_json_loading_failed(e)
+        if cache:
+            self._msgpack_body = data
+        return data
+
+
+class ResponseCompressor:
+    """
+    after_request hook compressing bodies of at least `min_size` bytes with the
+    best encoding the client accepts: zstd (if installed) before gzip.
+    """
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 5, zstd_level: int = 3):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self._zstd = zstandard.ZstdCompressor(level=zstd_level) if zstandard is not None else None
+
+    def encoding_for(self, accept_encodings) -> Optional[str]:
+        candidates = [('zstd', accept_encodings['zstd'])] if self._zstd is not None else []
+        candidates.append(('gzip', accept_encodings['gzip']))
+        encoding, quality = max(candidates, key=lambda candidate: candidate[1])
+        return encoding if quality > 0 else None
+
+    def compress(self, response: Response) -> Response:
+        if (response.direct_passthrough or response.is_streamed or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        encoding = self.encoding_for(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(self._compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == 'zstd':
+            return self._zstd.compress(body)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+class RequestDecompressor:
+    """
+    WSGI middleware decoding gzip or zstd request bodies (Content-Encoding),
+    so routes read them as usual. Chunked bodies (no Content-Length) are read
+    to the end of the stream. Encoded or decoded bodies larger than `max_size`
+    are rejected with 413 without being fully read or inflated.
+    """
+
+    def __init__(self, wsgi_app: Callable, max_size: int):
+        self.wsgi_app = wsgi_app
+        self.max_size = max_size
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding not in ('gzip', 'zstd'):
+            return self.wsgi_app(environ, start_response)
+        if encoding == 'zstd' and zstandard is None:
+            return self._error(start_response, '415 Unsupported Media Type', 'zstd request bodies are not supported')
+
+        if environ.get('CONTENT_LENGTH'):
+            length = int(environ['CONTENT_LENGTH'])
+            if length > self.max_size:
+                return self._error(start_response, '413 Request Entity Too Large', 'Request body is too large')
+            data = environ['wsgi.input'].read(length)
+        elif environ.get('wsgi.input_terminated') or 'chunked' in environ.get('HTTP_TRANSFER_ENCODING', '').lower():
+            data = self._read_to_end(environ['wsgi.input'])
+            if data is None:
+                return self._error(start_response, '413 Request Entity Too Large', 'Request body is too large')
+        else:
+            # Without a length or a terminated stream, reading to EOF could block
+            return self._error(start_response, '411 Length Required',
+                               'Compressed request bodies need Content-Length or chunked encoding')
+        try:
+            body = self._decompress(data, encoding)
+        except (OSError, EOFError, zlib.error, ValueError) as e:
+            return self._error(start_response, '400 Bad Request', f'Invalid {encoding} request body: {str(e)}')
+        if body is None:
+            return self._error(start_response, '413 Request Entity Too Large', 'Decompressed request body is too large')
+
+        environ = dict(environ, CONTENT_LENGTH=str(len(body)))
+        environ['wsgi.input'] = io.BytesIO(body)
+        del environ['HTTP_CONTENT_ENCODING']
+        # The decoded body has a length now; a leftover chunked header would make Werkzeug ignore it
+        environ.pop('HTTP_TRANSFER_ENCODING', None)
+        return self.wsgi_app(environ, start_response)
+
+    def _read_to_end(self, stream) -> Optional[bytes]:
+        """Chunked request body, or None past max_size"""
+        chunks, size = [], 0
+        while size <= self.max_size:
+            chunk = stream.read(min(READ_CHUNK_SIZE, self.max_size + 1 - size))
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+            size += len(chunk)
+        return None
+
+    def _decompress(self, data: bytes, encoding: str) -> Optional[bytes]:
+        """Decoded body, or None past max_size"""
+        if encoding == 'zstd':
+            body = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read(self.max_size + 1)
+        else:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(data, self.max_size + 1)
+            if not decompressor.eof and len(body) <= self.max_size:
+                raise EOFError("Truncated gzip stream")
+        return body if len(body) <= self.max_size else None
+
+    @staticmethod
+    def _error(start_response: Callable, status: str, message: str) -> Iterable[bytes]:
+        body = json.dumps({'success': False, 'error': message}).encode('utf-8')
+        start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+        return [body]
+
+
+if __name__ == '__main__':
+    # Bytes and CPU per request for each encoding: python encoding.py [iterations]
+    from local_analysis import LocalAnalyzer
+
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cv_text = '\n'.join([
+        'Jane Doe', 'jane.doe@example.com  +44 20 7946 0958', 'Summary',
+        'Backend engineer with 6 years of experience building APIs and data pipelines.', 'Experience',
+    ] + [f'- Developed service {i} in Python and Docker, reducing latency by {i % 50}% for {i * 1000} users'
+         for i in range(80)] + ['Education', 'BSc Computer Science, University of Leeds (2014 - 2017)',
+                                'Skills', 'Python, Docker, Kubernetes, PostgreSQL, React, AWS, Terraform'])
+    payloads = {
+        'analyze-cv response': {
+            'success': True, 'analysis': LocalAnalyzer().analyze(cv_text), 'document_id': 'a' * 64,
+            'cv_length': len(cv_text), 'cv_preview': cv_text[:200] + '...'
+        },
+        'generate-improvements request': {
+            'cv_text': cv_text, 'improvements': [f'Quantify achievement {i} with a metric' for i in range(20)]
+        },
+    }
+
+    codecs = {
+        'json (indented)': (lambda obj: json.dumps(obj, indent=2).encode('utf-8'), json.loads),
+        'json (compact)': (lambda obj: json.dumps(obj, separators=(',', ':')).encode('utf-8'), json.loads),
+    }
+    if orjson is not None:
+        codecs['orjson'] = (orjson.dumps, orjson.loads)
+    if msgpack is not None:
+        codecs['msgpack'] = (lambda obj: msgpack.packb(obj, use_bin_type=True), lambda data: msgpack.unpackb(data, raw=False))
+    compressors = {'identity': (lambda data: data, lambda data: data),
+                   'gzip': (lambda data: gzip.compress(data, compresslevel=5, mtime=0), gzip.decompress)}
+    if zstandard is not None:
+        compressors['zstd'] = (zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress)
+
+    print(f"available: {available_encodings()}")
+    for payload_name, payload in payloads.items():
+        print(f"\n{payload_name}")
+        print(f"{'encoding':<34}{'bytes':>9}{'encode us':>12}{'decode us':>12}")
+        for codec_name, (encode, decode) in codecs.items():
+            for compressor_name, (compress, decompress) in compressors.items():
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    body = compress(encode(payload))
+                encode_us = (time.perf_counter() - start) / iterations * 1e6
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    decode(decompress(body))
+                decode_us = (time.perf_counter() - start) / iterations * 1e6
+                print(f"{codec_name + ' + ' + compressor_name:<34}{len(body):>9}{encode_us:>12.1f}{decode_us:>12.1f}")
@@ -0,0 +1,239 @@
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# Contact details are looked for in the header region first
+HEADER_MAX_LINES = 12
+HEADER_MAX_CHARS = 1000
+
+CONTACT_TYPES = frozenset({'email', 'phone', 'linkedin', 'url'})
+CURRENT_WORDS = frozenset({'present', 'current', 'now', 'today'})
+
+_MONTHS = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+           r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)')
+MONTH_NUMBERS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), start=1)}
+
+# "Mar 2019", "03/2019", "2019"
+_DATE = rf'(?:{_MONTHS}\.?[ ]{{0,2}}(?:19|20)\d\d|(?:0?[1-9]|1[0-2])[/.\-](?:19|20)\d\d|(?:19|20)\d\d)'
+
+# One pass over the document finds every entity type. Alternatives are tried
+# in order at each position, so a date range wins over a phone-like run of
+# digits. Every repetition is bounded and every alternative starts behind a
+# lookbehind that rules out starting mid-token, which keeps the scan linear on
+# adversarial input (long dotted words, tables of numbers).
+_EMAIL = r'(?P<email>(?<![\w.%+-])[\w.%+-]{1,64}@[a-z0-9-]{1,63}(?:\.[a-z0-9-]{1,63}){0,8}\.[a-z]{2,24}(?![\w-]))'
+_URL = (r'''(?P<url>(?<![\w@/.])(?:https?://|www\.|(?:[a-z]{2,3}\.)?linkedin\.com/|github\.com/)'''
+        r'''[^\s<>"'()\[\]{}]{1,2000})''')
+_PHONE = r'(?P<phone>(?<![\w+.\-/])(?:\+|\(\+?)?\d(?:[\d ()\-]|\.(?=\d)){6,22}\d(?![\w/]))'
+ENTITY_PATTERN = re.compile(rf'''
+    {_EMAIL}
+  | {_URL}
+  | (?P<date_range>(?<![\w/.])(?P<range_start>{_DATE})[ ]{{0,3}}(?:-|–|—|to|until)[ ]{{0,3}}
+        (?P<range_end>{_DATE}|present|current|now|today)(?![\w/]))
+  | (?P<duration>(?<![\w.])(?P<amount>\d{{1,2}}(?:\.\d)?)\+?[ ]{{0,2}}(?P<unit>years?|yrs?|months?|mos?)(?!\w))
+  | (?P<date>(?<![\w/.]){_DATE}(?![\w/]))
+  | {_PHONE}
+''', re.IGNORECASE | re.VERBOSE)
+
+# Contact details only: no date alternatives to try at every digit, so tables
+# of years cost one rejected phone candidate per line instead of an entity per
+# year. Date ranges that look like phones are rejected by _is_phone.
+CONTACT_PATTERN = re.compile(f'{_EMAIL}|{_URL}|{_PHONE}', re.IGNORECASE)
+
+DATE_PARTS = re.compile(
+    rf'(?:(?P<month_name>{_MONTHS})\.?[ ]{{0,2}}|(?P<month>0?[1-9]|1[0-2])[/.\-])?(?P<year>(?:19|20)\d\d)',
+    re.IGNORECASE
+)
+DIGIT_GROUPS = re.compile(r'\d+')
+URL_TRAILING = '.,;:!?'
+
+
+def parse_date(text: str) -> Optional[str]:
+    """'Mar 2019' / '03/2019' -> '2019-03', '2019' -> '2019'"""
+    match = DATE_PARTS.fullmatch(text.strip())
+    if not match:
+        return None
+    if match.group('month_name'):
+        return f"{match.group('year')}-{MONTH_NUMBERS[match.group('month_name')[:3].lower()]:02d}"
+    if match.group('month'):
+        return f"{match.group('year')}-{int(match.group('month')):02d}"
+    return match.group('year')
+
+
+def _is_phone(candidate: str) -> bool:
+    """Reject digit runs that are not phone numbers (year lists, date ranges, short tables)"""
+    groups = DIGIT_GROUPS.findall(candidate)
+    # Pairs are common ("06 12 34 56 78"), single digits only as a prefix ("+33 6 ...")
+    if not 8 <= len(''.join(groups)) <= 15 or len(max(groups, key=len)) < 2:
+        return False
+    return not _is_dates(groups)
+
+
+def _is_dates(groups: List[str]) -> bool:
+    """Digit groups that are all years and months, e.g. '2019 - 2023' or '06 2019 - 08 2021'"""
+    years = [group for group in groups if len(group) == 4 and 1900 <= int(group) <= 2099]
+    return bool(years) and all(
+        group in years or (len(group) <= 2 and 1 <= int(group) <= 12) for group in groups
+    )
+
+
+class EntityExtractor:
+    """
+    Extracts emails, phones, URLs (LinkedIn separately), dates, date ranges
+    and durations from CV text in a single regex pass, with offsets.
+
+    All patterns are compiled once at import. Contact details come from the
+    header region and only fall back to the rest of the document when the
+    header lacks an email or phone.
+    """
+
+    def extract(self, text: str, start: int = 0, end: Optional[int] = None,
+                types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Entities in text[start:end], in text order. Each has `type`, `text`,
+        `start`, `end` (offsets into `text`), 1-based `line` and a normalized
+        `value`.
+        """
+        end = len(text) if end is None else end
+        wanted = frozenset(types) if types is not None else None
+        entities = []
+        line, line_position = 1 + text.count('\n', 0, start), start
+
+        pattern = CONTACT_PATTERN if wanted is not None and wanted <= CONTACT_TYPES else ENTITY_PATTERN
+        for match in pattern.finditer(text, start, end):
+            # lastgroup is the outermost group, i.e. the entity type
+            kind = match.lastgroup
+            if wanted is not None and kind not in wanted and not (kind == 'url' and 'linkedin' in wanted):
+                continue
+            entity = self._entity(kind, match)
+            if entity is None or (wanted is not None and entity['type'] not in wanted):
+                continue
+            line += text.count('\n', line_position, entity['start'])
+            line_position = entity['start']
+            entity['line'] = line
+            entities.append(entity)
+        return entities
+
+    def extract_contact(self, text: str) -> Dict[str, str]:
+        """Contact details (email, phone, linkedin, website, name), header region first"""
+        header_end = self.header_end(text)
+        contact = self._contact(self.extract(text, 0, header_end, CONTACT_TYPES))
+        if ('email' not in contact or 'phone' not in contact) and header_end < len(text):
+            for key, value in self._contact(self.extract(text, header_end, None, CONTACT_TYPES)).items():
+                contact.setdefault(key, value)
+
+        # Name: first short non-empty line
+        for line in text[:header_end].split('\n')[:5]:
+            if line.strip() and len(line.strip()) < 50:
+                contact['name'] = line.strip()
+                break
+        return contact
+
+    @staticmethod
+    def header_end(text: str) -> int:
+        """End offset of the header region: the first HEADER_MAX_LINES lines, at most HEADER_MAX_CHARS"""
+        position = 0
+        for _ in range(HEADER_MAX_LINES):
+            position = text.find('\n', position, HEADER_MAX_CHARS) + 1
+            if position == 0:
+                break
+        if position == 0:
+            # Fewer lines than the limit inside HEADER_MAX_CHARS: stop at the end of the line crossing it
+            newline = text.find('\n', HEADER_MAX_CHARS)
+            position = len(text) if newline < 0 else newline
+        return position
+
+    def _entity(self, kind: str, match) -> Optional[Dict[str, Any]]:
+        text = match.group(kind)
+        start = match.start(kind)
+
+        if kind == 'email':
+            value: Any = text.lower()
+        elif kind == 'url':
+            text = text.rstrip(URL_TRAILING)
+            value = text if text.lower().startswith('http') else 'https://' + text
+            if 'linkedin.com/' in text.lower():
+                kind = 'linkedin'
+        elif kind == 'phone':
+            if not _is_phone(text):
+                return None
+            value = ('+' if text.lstrip('(').startswith('+') else '') + ''.join(DIGIT_GROUPS.findall(text))
+        elif kind == 'date':
+            value = parse_date(text)
+        elif kind == 'date_range':
+            range_end = match.group('range_end')
+            current = range_end.lower() in CURRENT_WORDS
+            value = {
+                'start': parse_date(match.group('range_start')),
+                'end': None if current else parse_date(range_end),
+                'current': current
+            }
+        else:
+            amount = float(match.group('amount'))
+            months = amount * 12 if match.group('unit').lower().startswith('y') else amount
+            value = {'months': round(months)}
+
+        return {'type': kind, 'text': text, 'start': start, 'end': start + len(text), 'value': value}
+
+    @staticmethod
+    def _contact(entities: List[Dict[str, Any]]) -> Dict[str, str]:
+        contact = {}
+        for entity in entities:
+            key = {'email': 'email', 'phone': 'phone', 'linkedin': 'linkedin', 'url': 'website'}[entity['type']]
+            contact.setdefault(key, entity['text'])
+        return contact
+
+
+if __name__ == '__main__':
+    # Checks and adversarial timing against the previous per-call patterns: python entity_extractor.py [size]
+    extractor = EntityExtractor()
+    phones = {
+        '06 12 34 56 78': '0612345678',
+        '+33 6 12 34 56 78': '+33612345678',
+        '+44 20 7946 0958': '+442079460958',
+        '(555) 123-4567': '5551234567',
+        '+1 (555) 123-4567': '+15551234567',
+        '030.1234.5678': '03012345678',
+    }
+    for text, digits in phones.items():
+        found = extractor.extract('Jane Doe\nPhone: ' + text + '\n', types=('phone',))
+        assert [entity['value'] for entity in found] == [digits], (text, found)
+        assert extractor.extract_contact('Jane Doe\n' + text)['phone'] == text
+    for text in ('2019 - 2023', '06 2019 - 08 2021', '2018 2019 2020 2021', '1 2 3 4 5 6 7 8 9', '12 34 56'):
+        assert not extractor.extract(text, types=('phone',)), text
+    entities = extractor.extract('Jane Doe\njane@example.com\nlinkedin.com/in/jane\nAcme (Mar 2019 - Present), 3 years')
+    assert [entity['type'] for entity in entities] == ['email', 'linkedin', 'date_range', 'duration'], entities
+    assert entities[2]['value'] == {'start': '2019-03', 'end': None, 'current': True}
+    assert entities[3]['value'] == {'months': 36} and entities[3]['line'] == 4
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    legacy_email = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    legacy_phone = r'[\+\(]?[1-9][0-9 .\-\(\)]{8,}[0-9]'
+    cases = {
+        'dotted words': 'a.' * size,
+        'date table': '2019 2020 2021 2022 2023\n' * (size // 10),
+        'digit run': '1 ' * size + 'x',
+        'at signs': 'a@' * size + 'b.' * size,
+        'long domain': 'x@' + 'a-' * size + '.c',
+    }
+    for name, text in cases.items():
+        start = time.perf_counter()
+        re.findall(legacy_email, text)
+        re.findall(legacy_phone, text)
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        contact = extractor.extract_contact(text)
+        contact_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        entities = extractor.extract(text)
+        extract_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{name} ({len(text)} chars): legacy contact {legacy_ms:.1f} ms, "
+              f"extract_contact {contact_ms:.1f} ms, full extract {extract_ms:.1f} ms / {len(entities)} entities")
+        assert 'email' not in contact and 'phone' not in contact, (name, contact)
+        # Linear in the input: well under a millisecond per thousand characters
+        assert contact_ms < max(3 * legacy_ms, 1.0) + len(text) / 2000, (name, contact_ms, legacy_ms)
@@ -0,0 +1,448 @@
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from cv_parser import EDUCATION_KEYWORDS, EXPERIENCE_KEYWORDS, CVParser
+from entity_extractor import EntityExtractor
+from keyword_extractor import KeywordExtractor
+from search_index import _atomic_savez, _pack_strings, _unpack_strings
+
+logger = logging.getLogger(__name__)
+
+DEGREE_LEVELS = ('none', 'high_school', 'associate', 'bachelor', 'master', 'doctorate')
+
+# Only degree forms: "Scrum Master" or a driving licence is not a degree
+_DEGREE_WORDS = r"(?:of|in|degree|en|de|[12])\b"
+DEGREE_PATTERN = re.compile(rf'''
+    (?P<doctorate>\bph\.?\s?d\b|\bdoctorate\b|\bdoctor\ of\b|\bd\.?phil\b)
+  | (?P<master>\bmaster['’]s\b|\bmasters?\s+{_DEGREE_WORDS}|\bm\.?sc\b|\bm\.s\.|\bmba\b|\bm\.?eng\b|\bm\.a\.
+        |\bmphil\b|\bmaîtrise\b)
+  | (?P<bachelor>\bbachelors?\b|\bb\.?sc\b|\bb\.s\.|\bb\.?eng\b|\bb\.a\.|\bba\b(?=\s*\(?hons|\s+in\b)
+        |\blicen[cs]e\s+{_DEGREE_WORDS})
+  | (?P<associate>\bassociate(?:'s)?\ degree\b|\bassociate\ of\b)
+  | (?P<high_school>\bhigh\ school\b|\bsecondary\ school\b|\ba[\s-]levels?\b|\bged\b)
+''', re.IGNORECASE | re.VERBOSE)
+
+EXPERIENCE_WORD = re.compile(r'\bexperience\b', re.IGNORECASE)
+
+# Month assumed for dates given as a bare year
+YEAR_ONLY_MONTH = 6
+# Open start of a profile without a current role: never adds months
+NOT_OPEN = np.iinfo(np.int32).max
+
+
+def month_index(value: str) -> int:
+    """'2019-03' -> months since year 0; a bare '2019' counts as mid-year"""
+    year, _, month = value.partition('-')
+    return int(year) * 12 + (int(month) if month else YEAR_ONLY_MONTH) - 1
+
+
+def current_month(today: Optional[date] = None) -> int:
+    today = today or date.today()
+    return today.year * 12 + today.month - 1
+
+
+def merged_months(intervals: List[Tuple[int, int]]) -> int:
+    """Months covered by inclusive [start, end] month intervals, counting overlaps once"""
+    total = 0
+    current_start, current_end = None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end + 1:
+            if current_end is not None:
+                total += current_end - current_start + 1
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start + 1
+    return total
+
+
+def open_months(intervals: List[Tuple[int, Optional[int]]]) -> Tuple[int, int]:
+    """
+    Months covered by [start, end] intervals, where an end of None is still
+    open, as (closed months, open start). At any later month `now` the total
+    is closed + max(0, now - open start + 1): closed intervals are clipped to
+    before the earliest open start, since the open one covers everything after.
+    """
+    open_start = min((start for start, end in intervals if end is None), default=NOT_OPEN)
+    closed = [(start, min(end, open_start - 1)) for start, end in intervals
+              if end is not None and start < open_start]
+    return merged_months(closed), open_start
+
+
+class ExperienceTimelineParser:
+    """
+    Local structured profile of a CV for filtering without an LLM.
+
+    Date ranges in the experience section (found as in
+    CVParser._extract_experience, but keeping short bullet lines) split it
+    into roles: each role runs from the text before its date range to the
+    next role's. Overlapping roles are counted once in the total, and each
+    KeywordExtractor skill mentioned in a role is credited with that role's
+    months. The degree level is the highest degree found in the education
+    section ('none' when there is no such section). Without any dated roles,
+    the largest "N years ... experience" statement is used instead.
+    """
+
+    def __init__(self, parser: Optional[CVParser] = None):
+        self._parser = parser or CVParser(layout_aware=False)
+        self._entity_extractor = EntityExtractor()
+        self._keyword_extractor = KeywordExtractor()
+
+    def parse(self, text: str, today: Optional[date] = None) -> Dict[str, Any]:
+        now = current_month(today)
+        experience_text = self._parser._find_section(text, EXPERIENCE_KEYWORDS)
+        roles = self._roles(experience_text, now)
+
+        intervals = []
+        skill_intervals: Dict[str, List[Tuple[int, int]]] = {}
+        for role in roles:
+            interval = (role.pop('_start'), role.pop('_end'))
+            intervals.append(interval)
+            for skill in role['skills']:
+                skill_intervals.setdefault(skill, []).append(interval)
+        total_months = merged_months(intervals)
+        source = 'timeline' if roles else 'none'
+        if not roles:
+            stated = self._stated_months(text)
+            if stated:
+                total_months, source = stated, 'stated'
+
+        return {
+            'roles': roles,
+            'total_months': total_months,
+            'total_years': round(total_months / 12, 1),
+            'skill_years': {skill: round(merged_months(intervals) / 12, 1)
+                            for skill, intervals in sorted(skill_intervals.items())},
+            'degree_level': self._degree_level(text),
+            'source': source
+        }
+
+    def _roles(self, experience_text: str, now: int) -> List[Dict[str, Any]]:
+        ranges = [entity for entity in self._entity_extractor.extract(experience_text, types=('date_range',))
+                  if entity['value']['start']]
+        # A role runs from the line of its date range to the line of the next one
+        # (the first role also takes any text above it)
+        line_starts = [experience_text.rfind('\n', 0, entity['start']) + 1 for entity in ranges]
+        roles = []
+        for i, entity in enumerate(ranges):
+            value = entity['value']
+            start = month_index(value['start'])
+            end = now if value['current'] else month_index(value['end'])
+            if start > now or end < start:
+                continue
+            block_start = line_starts[i] if i else 0
+            block_end = line_starts[i + 1] if i + 1 < len(ranges) else len(experience_text)
+            block = experience_text[block_start:block_end]
+
+            title = experience_text[line_starts[i]:entity['start']].strip(' \t,;|(-–—') or \
+                experience_text[entity['end']:block_end].strip(' \t\n,;|)-–—').split('\n')[0]
+            roles.append({
+                'title': title[:100] or None,
+                'start': value['start'],
+                'end': value['end'],
+                'current': value['current'],
+                'months': min(end, now) - start + 1,
+                'skills': self._keyword_extractor.extract(block),
+                '_start': start,
+                '_end': min(end, now)
+            })
+        return roles
+
+    def _stated_months(self, text: str) -> int:
+        """Largest duration on a line that mentions experience, e.g. '6+ years of experience'"""
+        months = 0
+        for entity in self._entity_extractor.extract(text, types=('duration',)):
+            line_start = text.rfind('\n', 0, entity['start']) + 1
+            line_end = text.find('\n', entity['end'])
+            if EXPERIENCE_WORD.search(text, line_start, line_end if line_end >= 0 else len(text)):
+                months = max(months, entity['value']['months'])
+        return months
+
+    def _degree_level(self, text: str) -> str:
+        education_text = self._parser._find_section(text, EDUCATION_KEYWORDS)
+        level = 0
+        for match in DEGREE_PATTERN.finditer(education_text):
+            level = max(level, DEGREE_LEVELS.index(match.lastgroup))
+        return DEGREE_LEVELS[level]
+
+
+def _months_at(closed_months: np.ndarray, open_starts: np.ndarray, now: int) -> np.ndarray:
+    """Months as of month `now`: the closed part plus the open role's months so far"""
+    return closed_months.astype(np.int64) + np.maximum(0, now - open_starts.astype(np.int64) + 1)
+
+
+class ProfileTable:
+    """
+    Columnar store of CV profiles for bulk filtering before any LLM call.
+
+    Each candidate is a row. Total experience months (uint16) and degree
+    level (uint8) are numpy columns, and per-skill months are parallel
+    (row, skill, months) arrays. Roles marked current are stored open: months
+    hold the closed part only, and an open-start month column (int32,
+    NOT_OPEN when nothing is current) adds the months up to the filter date,
+    so "Present" roles keep counting after the CV was indexed. Filters are
+    vectorized over all rows.
+    Replaced and deleted candidates are tombstoned. With a `path`, the table
+    is saved as .npz every `save_every` additions, on every delete and on
+    save(), and loaded on startup.
+    """
+
+    def __init__(self, path: Optional[str] = None, save_every: int = 500):
+        self.path = path
+        self.save_every = save_every
+        self._lock = threading.RLock()
+        self._candidate_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._months = np.zeros(0, dtype=np.uint16)
+        self._open_start = np.zeros(0, dtype=np.int32)
+        self._degree = np.zeros(0, dtype=np.uint8)
+        self._alive = np.zeros(0, dtype=bool)
+        self._skills: List[str] = []
+        self._skill_ids: Dict[str, int] = {}
+        self._postings: Tuple[List[int], List[int], List[int], List[int]] = ([], [], [], [])
+        self._posting_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        self._unsaved = 0
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, candidate_id: str, profile: Dict[str, Any]):
+        """Store (or replace) a candidate's profile from ExperienceTimelineParser.parse"""
+        with self._lock:
+            if candidate_id in self._rows:
+                self._alive[self._rows[candidate_id]] = False
+            row = len(self._candidate_ids)
+            self._candidate_ids.append(candidate_id)
+            self._rows[candidate_id] = row
+            if row >= len(self._alive):
+                capacity = max(1024, 2 * len(self._alive))
+                self._months = np.resize(self._months, capacity)
+                self._open_start = np.resize(self._open_start, capacity)
+                self._degree = np.resize(self._degree, capacity)
+                self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+            (total_months, open_start), skill_months = self._timeline(profile)
+            self._months[row] = min(total_months, np.iinfo(np.uint16).max)
+            self._open_start[row] = open_start
+            self._degree[row] = DEGREE_LEVELS.index(profile['degree_level'])
+            self._alive[row] = True
+
+            rows, skill_ids, months, open_starts = self._postings
+            for skill, (closed, skill_open_start) in skill_months.items():
+                rows.append(row)
+                skill_ids.append(self._skill_id(skill))
+                months.append(closed)
+                open_starts.append(skill_open_start)
+            self._posting_arrays = None
+
+            self._unsaved += 1
+            if self.path and self._unsaved >= self.save_every:
+                self.save()
+
+    def delete(self, candidate_id: str) -> bool:
+        """Remove a candidate; returns False if it has no profile"""
+        with self._lock:
+            row = self._rows.pop(candidate_id, None)
+            if row is None:
+                return False
+            self._alive[row] = False
+            if self.path:
+                self.save()
+            return True
+
+    def filter(self, min_years: float = 0, degree: Optional[str] = None,
+               skills: Optional[Dict[str, float]] = None, limit: Optional[int] = None,
+               today: Optional[date] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Candidates with at least `min_years` of experience, at least the
+        `degree` level and, for every skill in `skills`, at least the given
+        years with it, most experienced first. Current roles count up to
+        `today`.
+
+        Returns:
+            (up to `limit` matches, total number of matches)
+
+        Raises:
+            ValueError: If `degree` is not one of DEGREE_LEVELS
+        """
+        with self._lock:
+            total_months, mask, skill_months = self._mask(min_years, degree, skills, current_month(today))
+            matches = np.flatnonzero(mask)
+            matched = len(matches)
+            matches = matches[np.argsort(-total_months[matches], kind='stable')][:limit]
+
+            results = []
+            for row in matches:
+                result = {
+                    'candidate_id': self._candidate_ids[row],
+                    'total_years': round(int(total_months[row]) / 12, 1),
+                    'degree_level': DEGREE_LEVELS[self._degree[row]]
+                }
+                if skill_months:
+                    result['skill_years'] = {
+                        skill: round(int(skill_rows_months[1][skill_rows_months[0] == row].max()) / 12, 1)
+                        for skill, skill_rows_months in skill_months.items()
+                    }
+                results.append(result)
+            return results, matched
+
+    def matching_ids(self, min_years: float = 0, degree: Optional[str] = None,
+                     skills: Optional[Dict[str, float]] = None, today: Optional[date] = None) -> List[str]:
+        """Ids of all candidates passing the filter, unordered"""
+        with self._lock:
+            _, mask, _ = self._mask(min_years, degree, skills, current_month(today))
+            return [self._candidate_ids[row] for row in np.flatnonzero(mask)]
+
+    def save(self):
+        """Write the table to `path` (no-op without one)"""
+        if not self.path:
+            return
+        with self._lock:
+            n_rows = len(self._candidate_ids)
+            rows, skill_ids, months, open_starts = self._arrays()
+            _atomic_savez(
+                self.path,
+                **_pack_strings('candidate_ids', self._candidate_ids),
+                months=self._months[:n_rows],
+                open_start=self._open_start[:n_rows],
+                degree=self._degree[:n_rows],
+                alive=self._alive[:n_rows],
+                **_pack_strings('skills', self._skills),
+                posting_rows=rows,
+                posting_skills=skill_ids,
+                posting_months=months,
+                posting_open_start=open_starts,
+            )
+            self._unsaved = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'profiles': len(self._rows),
+                'rows': len(self._candidate_ids),
+                'skills': len(self._skills),
+                'unsaved': self._unsaved
+            }
+
+    def _mask(self, min_years: float, degree: Optional[str], skills: Optional[Dict[str, float]],
+              now: int) -> Tuple[np.ndarray, np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Total months of every row as of month `now`, rows passing the filter,
+        and (rows, months) postings of each filtered skill
+        """
+        if degree is not None and degree not in DEGREE_LEVELS:
+            raise ValueError(f"Unknown degree level {degree!r}; expected one of {', '.join(DEGREE_LEVELS)}")
+
+        n_rows = len(self._candidate_ids)
+        total_months = _months_at(self._months[:n_rows], self._open_start[:n_rows], now)
+        mask = self._alive[:n_rows].copy()
+        if min_years:
+            mask &= total_months >= round(min_years * 12)
+        if degree:
+            mask &= self._degree[:n_rows] >= DEGREE_LEVELS.index(degree)
+
+        rows, skill_ids, closed_months, open_starts = self._arrays()
+        skill_months = {}
+        for skill, years in (skills or {}).items():
+            skill_id = self._skill_ids.get(skill.lower())
+            selected = np.flatnonzero(skill_ids == skill_id) if skill_id is not None else np.zeros(0, dtype=np.int64)
+            months = _months_at(closed_months[selected], open_starts[selected], now)
+            has_skill = np.zeros(n_rows, dtype=bool)
+            has_skill[rows[selected][months >= round(years * 12)]] = True
+            mask &= has_skill
+            skill_months[skill] = (rows[selected], months)
+        return total_months, mask, skill_months
+
+    @staticmethod
+    def _timeline(profile: Dict[str, Any]) -> Tuple[Tuple[int, int], Dict[str, Tuple[int, int]]]:
+        """(closed months, open start) of the whole profile and of each skill"""
+        roles = profile.get('roles')
+        if not roles:
+            # Stated experience (or no dates at all) is fixed
+            return ((profile['total_months'], NOT_OPEN),
+                    {skill: (round(years * 12), NOT_OPEN) for skill, years in profile['skill_years'].items()})
+
+        intervals = []
+        skill_intervals: Dict[str, List[Tuple[int, Optional[int]]]] = {}
+        for role in roles:
+            start = month_index(role['start'])
+            interval = (start, None if role['current'] else start + role['months'] - 1)
+            intervals.append(interval)
+            for skill in role['skills']:
+                skill_intervals.setdefault(skill, []).append(interval)
+        return open_months(intervals), {skill: open_months(skill_intervals[skill]) for skill in sorted(skill_intervals)}
+
+    def _skill_id(self, skill: str) -> int:
+        skill_id = self._skill_ids.get(skill)
+        if skill_id is None:
+            skill_id = self._skill_ids[skill] = len(self._skills)
+            self._skills.append(skill)
+        return skill_id
+
+    def _arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if self._posting_arrays is None:
+            rows, skill_ids, months, open_starts = self._postings
+            self._posting_arrays = (
+                np.array(rows, dtype=np.int32),
+                np.array(skill_ids, dtype=np.int32),
+                np.minimum(np.array(months, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16),
+                np.array(open_starts, dtype=np.int32)
+            )
+        return self._posting_arrays
+
+    def _load(self):
+        with np.load(self.path) as data:
+            self._months = data['months'].copy()
+            # Tables saved before open roles were stored have every row closed
+            self._open_start = (data['open_start'].copy() if 'open_start' in data.files
+                                else np.full(len(self._months), NOT_OPEN, dtype=np.int32))
+            self._degree = data['degree'].copy()
+            self._alive = data['alive'].copy()
+            self._candidate_ids = _unpack_strings(data, 'candidate_ids', len(self._alive))
+            self._skills = _unpack_strings(data, 'skills')
+            posting_months = data['posting_months'].tolist()
+            posting_open_starts = (data['posting_open_start'].tolist() if 'posting_open_start' in data.files
+                                   else [int(NOT_OPEN)] * len(posting_months))
+            self._postings = (data['posting_rows'].tolist(), data['posting_skills'].tolist(),
+                              posting_months, posting_open_starts)
+        self._skill_ids = {skill: skill_id for skill_id, skill in enumerate(self._skills)}
+        self._rows = {cid: row for row, cid in enumerate(self._candidate_ids) if self._alive[row]}
+        logger.info(f"Loaded {len(self._rows)} candidate profile(s) from {self.path}")
+
+
+if __name__ == '__main__':
+    # Benchmark: python experience_timeline.py [n_profiles]
+    n_profiles = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(0)
+    skills = sorted(KeywordExtractor().tech_skills)
+
+    table = ProfileTable()
+    start = time.perf_counter()
+    for i in range(n_profiles):
+        total = rng.randint(0, 360)
+        table.add(f"cv-{i}", {
+            'total_months': total,
+            'degree_level': rng.choice(DEGREE_LEVELS),
+            'skill_years': {skill: round(rng.randint(1, max(1, total)) / 12, 1) for skill in rng.sample(skills, 10)}
+        })
+    print(f"Stored {n_profiles} profiles in {time.perf_counter() - start:.1f}s: {table.stats()}")
+
+    timings = []
+    for _ in range(50):
+        query = {skill: rng.choice([1, 2, 3]) for skill in rng.sample(skills, 2)}
+        start = time.perf_counter()
+        results, matched = table.filter(min_years=5, degree='bachelor', skills=query, limit=100)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"Filter: p50 {timings[len(timings) // 2]:.1f} ms, p95 {timings[int(len(timings) * 0.95)]:.1f} ms")
+    print(f"Last query matched {matched}: {results[:3]}")
@@ -30,20 +30,22 @@ class KeywordExtractor:
             'time management', 'project management', 'critical thinking',
             'collaboration', 'mentoring', 'presentation', 'negotiation'
         }
+        
+        # Whole-word matchers, so 'r' does not match every word with an r in it
+        # and 'go' does not match 'good'
+        self._skill_patterns = {
+            skill: re.compile(rf'(?<![a-z0-9]){re.escape(skill)}(?![a-z0-9+#&])')
+            for skill in self.tech_skills | self.soft_skills
+        }
     
     def extract(self, text: str) -> List[str]:
         """Extract skills and keywords from text"""
         text_lower = text.lower()
         found_skills = set()
         
-        # Extract technical skills
-        for skill in self.tech_skills:
-            if skill in text_lower:
-                found_skills.add(skill)
-        
-        # Extract soft skills
-        for skill in self.soft_skills:
-            if skill in text_lower:
+        # Extract technical and soft skills (the substring test skips most regex searches)
+        for skill, pattern in self._skill_patterns.items():
+            if skill in text_lower and pattern.search(text_lower):
                 found_skills.add(skill)
         
         # Extract programming languages with version numbers
@@ -0,0 +1,252 @@
+import os
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Union
+from keyword_extractor import KeywordExtractor
+from prompts import Prompt
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackendError(Exception):
+    """Raised when an LLM backend fails to produce a response"""
+
+
+class UsageMetadata:
+    """Token usage for a single call, mirroring Gemini's usage_metadata fields"""
+
+    def __init__(self, prompt_token_count: int, candidates_token_count: int,
+                 cached_content_token_count: int = 0):
+        # As in Gemini, prompt_token_count includes the cached prefix tokens
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.cached_content_token_count = cached_content_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class LLMResponse:
+    """Minimal response object exposing the same attributes the routes use"""
+
+    def __init__(self, text: str, usage_metadata: UsageMetadata):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+# Smallest request Gemini's implicit prefix caching applies to (2.5 Flash;
+# larger models need more, check the model's documentation)
+IMPLICIT_CACHE_MIN_TOKENS = 1024
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+
+class LLMBackend:
+    """Interface implemented by every LLM backend"""
+
+    name = 'base'
+
+    def generate_content(self, prompt: Union[str, Prompt]):
+        """
+        Generate a response for the prompt; the result exposes `.text` and `.usage_metadata`.
+        A `Prompt` sends its static prefix first, so repeated prefixes can be cached by the provider.
+        """
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini backend.
+
+    Prompts are sent in full, static prefix first. Explicit context caching is
+    not used: Gemini only caches content above a per-model minimum of a few
+    thousand tokens, and every template prefix is far smaller. Repeated
+    prefixes can still hit Gemini's implicit prefix caching where the model
+    supports it, which shows up as `cached_content_token_count` in usage.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, api_key: str, model_name: str = 'gemini-2.0-flash'):
+        # Imported here so the fake backend can run without the Gemini SDK configured
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, prompt: Union[str, Prompt]):
+        return self._model.generate_content(str(prompt))
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic local stand-in for Gemini, used for load and soak testing.
+
+    Responses are schema-valid JSON templated from the prompt content, so the
+    same prompt always yields the same payload. Latency follows a log-normal
+    distribution around `latency_ms`, and failures are injected at `error_rate`.
+
+    With `prefix_cache`, implicit prefix caching is simulated for `Prompt`s of
+    at least `min_cache_tokens`: after a template's first call, its prefix is
+    reported as cached tokens and the cached share of the prompt is processed
+    `cache_speedup` times faster.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency_ms: float = 800, latency_sigma: float = 0.5,
+                 max_latency_ms: float = 30000, error_rate: float = 0.0,
+                 output_tokens: Optional[int] = None, seed: Optional[int] = None,
+                 prefix_cache: bool = False, cache_speedup: float = 4.0,
+                 min_cache_tokens: int = IMPLICIT_CACHE_MIN_TOKENS):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.max_latency_ms = max_latency_ms
+        self.error_rate = error_rate
+        self.output_tokens = output_tokens
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.prefix_cache = prefix_cache
+        self.cache_speedup = cache_speedup
+        self.min_cache_tokens = min_cache_tokens
+        self._cached_prefixes = set()
+        self._keyword_extractor = KeywordExtractor()
+
+    def generate_content(self, prompt: Union[str, Prompt]) -> LLMResponse:
+        text = str(prompt)
+        prompt_tokens = estimate_tokens(text)
+        cached_tokens = 0
+
+        with self._lock:
+            latency = self.latency_ms * math.exp(self.latency_sigma * self._rng.gauss(0, 1))
+            fail = self._rng.random() < self.error_rate
+            if isinstance(prompt, Prompt) and self.prefix_cache and prompt_tokens >= self.min_cache_tokens:
+                fingerprint = prompt.template.fingerprint
+                if fingerprint in self._cached_prefixes:
+                    cached_tokens = min(prompt_tokens, estimate_tokens(prompt.prefix))
+                self._cached_prefixes.add(fingerprint)
+
+        cached_share = cached_tokens / prompt_tokens
+        latency *= 1 - cached_share + cached_share / self.cache_speedup
+        time.sleep(min(latency, self.max_latency_ms) / 1000.0)
+        if fail:
+            raise LLMBackendError("Injected failure from fake LLM backend")
+
+        response_text = self._render(text)
+        output_tokens = self.output_tokens if self.output_tokens is not None else estimate_tokens(response_text)
+        return LLMResponse(response_text, UsageMetadata(prompt_tokens, output_tokens, cached_tokens))
+
+    def _render(self, prompt: str) -> str:
+        """Pick a response template based on which route built the prompt"""
+        # Seed per prompt so identical requests produce identical responses
+        rng = random.Random(zlib.crc32(prompt.encode('utf-8')))
+        skills = self._keyword_extractor.extract(prompt)
+
+        if '"patches"' in prompt:
+            section_ids = re.findall(r'<<<SECTION id=(\d+) name=(\w+)', prompt)
+            return json.dumps({'patches': [
+                {'id': int(section_id), 'replacement': f"{name.upper()}\nImproved {name} content."}
+                for section_id, name in section_ids
+            ]})
+        if 'is_valid_cv' in prompt:
+            return json.dumps(self._analysis(rng, skills))
+        if 'match_score' in prompt:
+            return json.dumps(self._match(rng, skills))
+        if 'rewrite the CV' in prompt:
+            return "PROFESSIONAL SUMMARY\nResults-driven professional.\n\nSKILLS\n" + ', '.join(skills)
+        return "This is a response from the fake LLM backend."
+
+    def _analysis(self, rng: random.Random, skills: List[str]) -> Dict[str, Any]:
+        return {
+            'is_valid_cv': True,
+            'sections_found': ['contact', 'experience', 'education', 'skills'],
+            'missing_sections': ['certifications'],
+            'extracted_sections': {
+                'contact': {
+                    'name': 'Jane Doe',
+                    'email': 'jane.doe@example.com',
+                    'phone': None,
+                    'location': None,
+                    'linkedin': None
+                },
+                'background': None,
+                'experience': [{
+                    'title': 'Software Engineer',
+                    'company': 'Example Corp',
+                    'duration': '2020 - Present',
+                    'description': 'Developed and maintained web applications'
+                }],
+                'education': [{
+                    'degree': 'BSc Computer Science',
+                    'institution': 'Example University',
+                    'year': '2020',
+                    'details': None
+                }],
+                'skills': skills[:15],
+                'certifications': [],
+                'interests': None
+            },
+            'overall_score': rng.randint(55, 95),
+            'ats_compatibility_score': rng.randint(50, 95),
+            'strengths': ['Clear structure', 'Relevant technical skills', 'Consistent formatting'],
+            'improvements': [{
+                'section': 'experience',
+                'issue': 'Few quantified achievements',
+                'suggestion': 'Add metrics to your key accomplishments',
+                'priority': 'high'
+            }],
+            'formatting_issues': [],
+            'recommended_keywords': ['leadership', 'communication']
+        }
+
+    def _match(self, rng: random.Random, skills: List[str]) -> Dict[str, Any]:
+        score = rng.randint(30, 95)
+        return {
+            'match_score': score,
+            'verdict': 'strong' if score >= 80 else 'moderate' if score >= 60 else 'weak',
+            'matching_skills': skills[:10],
+            'missing_skills': ['docker', 'aws', 'kubernetes'],
+            'suggestions': ['Quantify your achievements with metrics'],
+            'strengths': ['Relevant technical background']
+        }
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """
+    Build the LLM backend selected by the LLM_BACKEND environment variable.
+
+    Raises:
+        ValueError: If the backend is unknown or Gemini is selected without an API key
+    """
+    name = (name or os.getenv('LLM_BACKEND', 'gemini')).lower()
+
+    if name == 'gemini':
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        return GeminiBackend(api_key, os.getenv('GEMINI_MODEL', 'gemini-2.0-flash'))
+
+    if name == 'fake':
+        output_tokens = os.getenv('FAKE_LLM_OUTPUT_TOKENS')
+        seed = os.getenv('FAKE_LLM_SEED')
+        return FakeLLMBackend(
+            latency_ms=float(os.getenv('FAKE_LLM_LATENCY_MS', '800')),
+            latency_sigma=float(os.getenv('FAKE_LLM_LATENCY_SIGMA', '0.5')),
+            max_latency_ms=float(os.getenv('FAKE_LLM_MAX_LATENCY_MS', '30000')),
+            error_rate=float(os.getenv('FAKE_LLM_ERROR_RATE', '0')),
+            output_tokens=int(output_tokens) if output_tokens else None,
+            seed=int(seed) if seed else None,
+            prefix_cache=os.getenv('FAKE_LLM_PREFIX_CACHE', 'false').lower() == 'true',
+            cache_speedup=float(os.getenv('FAKE_LLM_CACHE_SPEEDUP', '4')),
+            min_cache_tokens=int(os.getenv('FAKE_LLM_CACHE_MIN_TOKENS', str(IMPLICIT_CACHE_MIN_TOKENS))),
+        )
+
+    raise ValueError(f"Unknown LLM_BACKEND: {name}")
@@ -0,0 +1,301 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+from admission import LatencyTracker
+from llm_backend import LLMBackend, LLMBackendError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(LLMBackendError):
+    """Raised without calling the backend while the circuit is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("LLM circuit breaker is open")
+        self.retry_after = retry_after
+
+
+class LLMSaturatedError(CircuitOpenError):
+    """Raised without calling the backend while too many abandoned calls are still running"""
+
+    def __init__(self, retry_after: float):
+        LLMBackendError.__init__(self, "Too many abandoned LLM calls are still running")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. It then lets a single probe call
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: If the call must not reach the backend
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self._retry_after())
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_retryable_failure(self) -> bool:
+        """
+        Record a failed attempt that is about to be retried. Returns False,
+        recording nothing, if the circuit is not closed or this failure would
+        open it; the caller then fails and records the failure as usual.
+        """
+        with self._lock:
+            if self._current_state() != self.CLOSED or self._failures + 1 >= self.failure_threshold:
+                return False
+            self._failures += 1
+            return True
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                    logger.warning(f"LLM circuit opened after {self._failures} consecutive failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'times_opened': self._times_opened,
+                'retry_after': round(self._retry_after(), 1) if self._state == self.OPEN else 0,
+            }
+
+
+class _CallState:
+    """Shared by the attempts of one call; responses arriving after it was abandoned are not recorded"""
+
+    def __init__(self, on_response: Optional[Callable[[Any], None]]):
+        self.on_response = on_response
+        self.abandoned = False
+
+
+class HedgedLLMClient:
+    """
+    LLM calls with hedging, one retry, an overall timeout and a circuit breaker.
+
+    If the first call has not returned after the `hedge_percentile` of recent
+    call durations, a second identical call is issued and the first valid
+    response wins. If the first call fails (or is invalid) while no other
+    attempt is running, it is retried once instead; the failed attempt counts
+    toward the breaker on its own. Hedges and retries are limited to
+    `max_hedge_ratio` and `max_retry_ratio` of calls so a slow or failing
+    backend does not see double the load.
+
+    Threads cannot be interrupted, so losing and timed-out calls are
+    abandoned: they finish in the background, their responses are discarded
+    and not passed to `on_response`. While `max_abandoned` of them are still
+    running, no hedges are issued and new calls fail fast.
+    """
+
+    def __init__(self, backend: LLMBackend, latency: LatencyTracker,
+                 breaker: Optional[CircuitBreaker] = None, hedging: bool = True,
+                 hedge_percentile: float = 0.95, min_hedge_delay: float = 0.5,
+                 max_hedge_ratio: float = 0.1, max_retry_ratio: float = 0.1, timeout: float = 60,
+                 workers: int = 16, max_abandoned: Optional[int] = None):
+        self.backend = backend
+        self.latency = latency
+        self.breaker = breaker or CircuitBreaker()
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_retry_ratio = max_retry_ratio
+        self.timeout = timeout
+        # Abandoned calls hold workers; by default they may take at most half of them
+        self.max_abandoned = max_abandoned if max_abandoned is not None else max(1, workers // 2)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm')
+        self._counts = {'calls': 0, 'hedges': 0, 'hedge_wins': 0, 'retries': 0, 'retry_wins': 0,
+                        'failures': 0, 'short_circuited': 0, 'abandoned': 0}
+        self._abandoned_running = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, validate: Optional[Callable[[Any], bool]] = None,
+                         on_response: Optional[Callable[[Any], None]] = None):
+        """
+        Return the first valid response.
+
+        Args:
+            prompt: Prompt sent to the backend
+            validate: Optional check on a response (e.g. parses as JSON);
+                an invalid response counts as a failed attempt
+            on_response: Optional hook called with every backend response that
+                arrives before the call is settled (e.g. for token accounting);
+                responses of abandoned attempts are not passed to it
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            LLMSaturatedError: If `max_abandoned` abandoned calls are still running
+            TimeoutError: If no valid response arrives within `timeout`
+            LLMBackendError: If every attempt failed or was invalid
+        """
+        try:
+            if self._saturated():
+                raise LLMSaturatedError(self.latency.percentile(0.5))
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._count('short_circuited')
+            raise
+        self._count('calls')
+
+        try:
+            response = self._hedged_call(prompt, validate, _CallState(on_response))
+        except Exception:
+            self._count('failures')
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return response
+
+    def _hedged_call(self, prompt: str, validate: Optional[Callable[[Any], bool]], call: _CallState):
+        deadline = time.monotonic() + self.timeout
+        pending = {self._executor.submit(self._timed_call, prompt, call): 'primary'}
+        hedge_delay = max(self.min_hedge_delay, self.latency.percentile(self.hedge_percentile))
+        can_hedge = self.hedging
+        can_retry = True
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                wait_for = deadline - time.monotonic()
+                if can_hedge:
+                    wait_for = min(wait_for, hedge_delay)
+                done, _ = wait(pending, timeout=max(0.0, wait_for), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    attempt = pending.pop(future)
+                    try:
+                        response = future.result()
+                        if validate is None or validate(response):
+                            if attempt != 'primary':
+                                self._count(f"{attempt}_wins")
+                            return response
+                        last_error = LLMBackendError("LLM returned an invalid response")
+                    except Exception as e:
+                        last_error = e
+
+                if not pending:
+                    # Failed fast with nothing else running: retry once, unless that would open the circuit
+                    if (can_retry and time.monotonic() < deadline and self._within_ratio('retries', self.max_retry_ratio)
+                            and self.breaker.record_retryable_failure()):
+                        can_retry = can_hedge = False
+                        self._count('retries')
+                        logger.info(f"Retrying failed LLM call: {last_error}")
+                        pending[self._executor.submit(self._timed_call, prompt, call)] = 'retry'
+                    continue
+
+                if can_hedge and not self._saturated() and self._within_ratio('hedges', self.max_hedge_ratio):
+                    # Primary is slow: race a second request against it
+                    can_hedge = can_retry = False
+                    self._count('hedges')
+                    logger.info(f"Hedging LLM call after {hedge_delay:.2f}s")
+                    pending[self._executor.submit(self._timed_call, prompt, call)] = 'hedge'
+                    continue
+                can_hedge = False
+
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"LLM call did not complete within {self.timeout:.0f}s")
+
+            raise last_error
+        finally:
+            if pending:
+                self._abandon(call, pending)
+
+    def _timed_call(self, prompt: str, call: _CallState):
+        start = time.monotonic()
+        response = self.backend.generate_content(prompt)
+        self.latency.record(time.monotonic() - start)
+        with self._lock:
+            record = call.on_response is not None and not call.abandoned
+        if record:
+            try:
+                call.on_response(response)
+            except Exception:
+                logger.exception("LLM response hook failed")
+        return response
+
+    def _abandon(self, call: _CallState, futures):
+        """Stop recording the call's responses and track attempts still holding a worker"""
+        with self._lock:
+            call.abandoned = True
+        for future in futures:
+            if future.cancel() or future.done():
+                continue
+            with self._lock:
+                self._counts['abandoned'] += 1
+                self._abandoned_running += 1
+            future.add_done_callback(self._abandoned_done)
+
+    def _abandoned_done(self, _future):
+        with self._lock:
+            self._abandoned_running -= 1
+
+    def _saturated(self) -> bool:
+        with self._lock:
+            return self._abandoned_running >= self.max_abandoned
+
+    def _within_ratio(self, name: str, max_ratio: float) -> bool:
+        """Whether one more hedge or retry stays within `max_ratio` of calls"""
+        with self._lock:
+            return self._counts[name] + 1 <= max_ratio * self._counts['calls']
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts, abandoned_running=self._abandoned_running)
+        return dict(counts, hedging=self.hedging, circuit=self.breaker.stats())
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List
+from ats_analyzer import ATSAnalyzer
+from cv_parser import CVParser
+from keyword_extractor import KeywordExtractor
+from rule_engine import get_rule_engine
+from section_detector import SectionDetector
+from suggestion_generator import SuggestionGenerator
+
+
+class LocalAnalyzer:
+    """
+    Heuristic CV analysis and job matching without an LLM.
+
+    Used as the degraded path while the LLM is unavailable. Results follow the
+    same schema as the LLM responses of /analyze-cv and /match-job, so clients
+    need no special handling beyond the `degraded` flag set by the routes.
+    """
+
+    def __init__(self):
+        self._ats_analyzer = ATSAnalyzer()
+        self._section_detector = SectionDetector()
+        self._suggestion_generator = SuggestionGenerator()
+        self._keyword_extractor = KeywordExtractor()
+        self._parser = CVParser(layout_aware=False)
+
+    def analyze(self, cv_text: str) -> Dict[str, Any]:
+        """Analysis in the /analyze-cv schema"""
+        hits = get_rule_engine().scan(cv_text)
+        sections = self._section_detector.detect(cv_text, hits)
+        missing = self._section_detector.find_missing(sections)
+        skills = self._keyword_extractor.extract(cv_text)
+        ats = self._ats_analyzer.analyze(cv_text, hits)
+        suggestions = self._suggestion_generator.generate(cv_text, sections, skills, hits)
+
+        required = self._section_detector.required_sections
+        completeness = sum(sections[name] for name in required) / len(required)
+        overall_score = round(completeness * 60 + ats['score'] * 0.4)
+
+        return {
+            'is_valid_cv': True,
+            'sections_found': [name for name, found in sections.items() if found],
+            'missing_sections': missing,
+            'extracted_sections': {
+                'contact': self.contact(cv_text),
+                'background': None,
+                'experience': [],
+                'education': [],
+                'skills': skills,
+                'certifications': [],
+                'interests': None
+            },
+            'overall_score': overall_score,
+            'ats_compatibility_score': ats['score'],
+            'strengths': self._strengths(sections, skills, ats),
+            'improvements': [
+                {
+                    'section': suggestion.get('section', suggestion['type']),
+                    'issue': suggestion['message'],
+                    'suggestion': suggestion.get('example') or suggestion['message'],
+                    'priority': suggestion['priority']
+                }
+                for suggestion in suggestions
+            ],
+            'formatting_issues': ats['issues'],
+            'recommended_keywords': []
+        }
+
+    def contact(self, cv_text: str) -> Dict[str, Any]:
+        """Contact details in the /analyze-cv schema, extracted locally"""
+        contact = self._parser._extract_contact(cv_text)
+        return {
+            'name': contact.get('name'),
+            'email': contact.get('email'),
+            'phone': contact.get('phone'),
+            'location': None,
+            'linkedin': contact.get('linkedin')
+        }
+
+    def match(self, cv_text: str, job_description: str) -> Dict[str, Any]:
+        """Skill-overlap match in the /match-job schema"""
+        cv_skills = set(self._keyword_extractor.extract(cv_text))
+        job_skills = set(self._keyword_extractor.extract(job_description))
+        matching = sorted(cv_skills & job_skills)
+        missing = sorted(job_skills - cv_skills)
+
+        score = round(100 * len(matching) / len(job_skills)) if job_skills else 50
+        return {
+            'match_score': score,
+            'verdict': 'strong' if score >= 80 else 'moderate' if score >= 60 else 'weak',
+            'matching_skills': matching,
+            'missing_skills': missing,
+            'suggestions': [f"Highlight any experience you have with {skill}" for skill in missing[:5]],
+            'strengths': [f"Experience with {skill}" for skill in matching[:5]]
+        }
+
+    def _strengths(self, sections: Dict[str, bool], skills: List[str], ats: Dict[str, Any]) -> List[str]:
+        strengths = []
+        if all(sections[name] for name in ('experience', 'education', 'skills')):
+            strengths.append('Includes the standard Experience, Education and Skills sections')
+        if len(skills) >= 5:
+            strengths.append(f"Lists {len(skills)} recognized skills")
+        if ats['keyword_density'] >= 50:
+            strengths.append('Uses strong action verbs')
+        return strengths
@@ -0,0 +1,163 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles.
+
+    Each of the `num_perm` hash functions is a multiply-shift hash of the
+    shingle's crc32. The fraction of equal signature positions between two
+    documents estimates the Jaccard similarity of their shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = WORD_PATTERN.findall(text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        grams = {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self.shingles(text)
+        # uint64 multiply wraps mod 2**64; the high 32 bits are the hash value
+        with np.errstate(over='ignore'):
+            permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+        return float(np.mean(signature == other))
+
+
+def lsh_bands(num_perm: int, threshold: float, min_recall: float = 0.9) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows == num_perm for an index keeping pairs of
+    at least `threshold` similarity.
+
+    A pair of similarity s shares a band with probability
+    1 - (1 - s ** rows) ** bands. Picks the most selective split (highest
+    S-curve threshold (1 / bands) ** (1 / rows)) under which a pair at exactly
+    `threshold` still becomes a candidate with probability `min_recall`, so the
+    S-curve sits below the target instead of on it. The similarity check on
+    candidates removes the extra ones.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    recalled = [option for option in options
+                if 1 - (1 - threshold ** option[1]) ** option[0] >= min_recall] or [(num_perm, 1)]
+    return max(recalled, key=lambda option: (1 / option[0]) ** (1 / option[1]))
+
+
+class NearDuplicateIndex:
+    """
+    Local LSH index of MinHash signatures for finding near-duplicate CVs.
+
+    Signatures are split into bands. Documents sharing any band are candidates,
+    and candidates are kept when their estimated similarity reaches
+    `threshold`. The index holds at most `max_entries` documents and evicts the
+    least recently added.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, max_entries: int = 10000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self._signatures: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._buckets: List[Dict[bytes, set]] = [defaultdict(set) for _ in range(self.bands)]
+        self._lock = threading.Lock()
+
+    def add(self, document_id: str, text: str) -> List[Dict[str, Any]]:
+        """Index a document and return its near duplicates, most similar first"""
+        signature = self.hasher.signature(text)
+        with self._lock:
+            matches = self._query(signature, exclude=document_id)
+            if document_id in self._signatures:
+                self._remove(document_id)
+            self._signatures[document_id] = signature
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band][key].add(document_id)
+            while len(self._signatures) > self.max_entries:
+                self._remove(next(iter(self._signatures)))
+        return matches
+
+    def query(self, text: str) -> List[Dict[str, Any]]:
+        """Near duplicates of a text without indexing it"""
+        signature = self.hasher.signature(text)
+        with self._lock:
+            return self._query(signature)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _query(self, signature: np.ndarray, exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        candidates.discard(exclude)
+
+        matches = []
+        for candidate in candidates:
+            similarity = MinHasher.similarity(signature, self._signatures[candidate])
+            if similarity >= self.threshold:
+                matches.append({'document_id': candidate, 'similarity': round(similarity, 3)})
+        return sorted(matches, key=lambda match: -match['similarity'])
+
+    def _remove(self, document_id: str):
+        signature = self._signatures.pop(document_id)
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(document_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+
+if __name__ == '__main__':
+    # Candidate recall at the configured threshold: python near_duplicate.py [threshold]
+    import sys
+    import time
+
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 0.8
+    rng = np.random.default_rng(7)
+    vocabulary = [f'word{i}' for i in range(5000)]
+    index = NearDuplicateIndex(threshold=threshold)
+    pairs = []
+    for i in range(300):
+        words = list(rng.choice(vocabulary, size=300))
+        variant = list(words)
+        for position in rng.choice(len(words), size=int(rng.integers(8, 12)), replace=False):
+            variant[position] = str(rng.choice(vocabulary))
+        index.add(f'doc{i}', ' '.join(words))
+        pairs.append((f'doc{i}', ' '.join(variant)))
+
+    start = time.perf_counter()
+    expected = found = 0
+    for document_id, variant in pairs:
+        signature = index.hasher.signature(variant)
+        if MinHasher.similarity(signature, index._signatures[document_id]) >= threshold:
+            expected += 1
+            found += any(match['document_id'] == document_id for match in index.query(variant))
+    took_ms = (time.perf_counter() - start) * 1000
+
+    recall = found / expected
+    print(f"bands x rows {index.bands} x {index.rows}, S-curve threshold "
+          f"{(1 / index.bands) ** (1 / index.rows):.2f}; recall at >= {threshold}: "
+          f"{found}/{expected} = {recall:.3f} ({took_ms / len(pairs):.2f} ms/query)")
+    assert expected >= 100, expected
+    assert recall >= 0.9, recall
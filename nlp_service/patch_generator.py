@@ -0,0 +1,138 @@
+import json
+from typing import Any, Dict, List, Optional
+from prompts import PATCH_SECTIONS, Prompt
+from section_detector import SectionDetector
+
+
+class PatchGenerator:
+    """
+    Section-level CV improvements.
+
+    Instead of asking the LLM to regenerate the whole CV, only the sections
+    targeted by the improvements are sent, and the LLM returns one replacement
+    per section. Generated output (and its latency) therefore scales with the
+    amount of change, not with the document size.
+    """
+
+    def __init__(self):
+        self._section_detector = SectionDetector()
+
+    def plan(self, cv_text: str, improvements: Any) -> Optional[Dict[str, Any]]:
+        """
+        Select the sections to rewrite.
+
+        Returns:
+            {'targets': [...], 'general': [...]}, or None if no improvement
+            refers to a known section. Targets are existing segments, or
+            insertions at the end of the CV for sections that are missing.
+        """
+        segments = self._section_detector.segment(cv_text)
+        targets: List[Dict[str, Any]] = []
+        general: List[str] = []
+
+        for improvement in self._as_list(improvements):
+            label = str(improvement.get('section') or '') if isinstance(improvement, dict) else str(improvement)
+            name = self._section_detector.canonical_section(label)
+            instruction = self._describe(improvement)
+            if not name:
+                general.append(instruction)
+                continue
+
+            matches = [seg for seg in segments if seg['name'] == name]
+            if not matches and name == 'contact':
+                matches = [seg for seg in segments if seg['name'] == 'header']
+            if not matches:
+                matches = [{'name': name, 'start': len(cv_text), 'end': len(cv_text)}]
+
+            for segment in matches:
+                target = next((t for t in targets if t['start'] == segment['start'] and t['name'] == segment['name']), None)
+                if target is None:
+                    target = dict(segment, instructions=[])
+                    targets.append(target)
+                target['instructions'].append(instruction)
+
+        if not targets:
+            return None
+        for index, target in enumerate(targets):
+            target['id'] = index
+        return {'targets': targets, 'general': general}
+
+    def build_prompt(self, cv_text: str, plan: Dict[str, Any]) -> Prompt:
+        """Prompt containing only the targeted sections and their improvements"""
+        blocks = []
+        for target in plan['targets']:
+            original = cv_text[target['start']:target['end']].strip()
+            status = 'EXISTING' if original else 'NEW (missing from the CV, write it including its header)'
+            instructions = '\n'.join(f"- {item}" for item in target['instructions'])
+            blocks.append(
+                f"<<<SECTION id={target['id']} name={target['name']} status={status}>>>\n"
+                f"Improvements:\n{instructions}\n"
+                f"Current text:\n{original}\n"
+                f"<<<END SECTION>>>"
+            )
+        general = '\n'.join(f"- {item}" for item in plan['general']) or '- None'
+        return PATCH_SECTIONS.render(general=general, sections='\n\n'.join(blocks))
+
+    def parse_patches(self, cv_text: str, plan: Dict[str, Any], data: Any) -> Optional[List[Dict[str, Any]]]:
+        """
+        Turn the LLM's {"patches": [...]} into offset patches against the original text.
+
+        Returns:
+            Patches sorted by offset, at most one per target id (the first), or
+            None if the reply does not follow the schema or patches no target,
+            in which case callers fall back to a full rewrite.
+        """
+        items = data.get('patches') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return None
+        
+        targets = {target['id']: target for target in plan['targets']}
+        patches = []
+        for item in items:
+            target = targets.pop(self._as_int(item.get('id')), None)
+            replacement = item.get('replacement')
+            if target is None or not isinstance(replacement, str):
+                continue
+            if not replacement.endswith('\n'):
+                replacement += '\n'
+            if target['start'] == len(cv_text) and cv_text and not cv_text.endswith('\n'):
+                replacement = '\n' + replacement
+            patches.append({
+                'section': target['name'],
+                'start': target['start'],
+                'end': target['end'],
+                'original': cv_text[target['start']:target['end']],
+                'replacement': replacement,
+            })
+        return sorted(patches, key=lambda patch: patch['start']) or None
+
+    def apply(self, cv_text: str, patches: List[Dict[str, Any]]) -> str:
+        """Apply offset patches to the original text"""
+        parts = []
+        position = 0
+        for patch in sorted(patches, key=lambda patch: patch['start']):
+            parts.append(cv_text[position:patch['start']])
+            parts.append(patch['replacement'])
+            position = max(position, patch['end'])
+        parts.append(cv_text[position:])
+        return ''.join(parts)
+
+    def _as_list(self, improvements: Any) -> List[Any]:
+        if isinstance(improvements, str):
+            try:
+                improvements = json.loads(improvements)
+            except ValueError:
+                return [line.strip('-• ') for line in improvements.splitlines() if line.strip()]
+        return improvements if isinstance(improvements, list) else [improvements]
+
+    def _describe(self, improvement: Any) -> str:
+        if isinstance(improvement, dict):
+            parts = [improvement.get('issue'), improvement.get('suggestion') or improvement.get('message')]
+            return ': '.join(str(part) for part in parts if part) or json.dumps(improvement)
+        return str(improvement)
+
+    def _as_int(self, value: Any) -> Optional[int]:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
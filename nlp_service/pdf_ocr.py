@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from result_cache import ResultCache
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+def page_fingerprint(page) -> Optional[str]:
+    """
+    Hash a pdfplumber page by its embedded image streams.
+
+    Returns None for pages without images (nothing to OCR). The raw stream
+    bytes are hashed without decoding, so this is cheap even for large scans.
+    """
+    if not page.images:
+        return None
+    digest = hashlib.sha256(f"{page.width}x{page.height}".encode())
+    for image in page.images:
+        digest.update(image['stream'].get_rawdata() or b'')
+    return digest.hexdigest()
+
+
+def ocr_page(pdf_path: str, page_index: int, dpi: int, lang: str) -> str:
+    """Rasterize one PDF page and OCR it. Runs inside a WorkerPool process."""
+    import pypdfium2 as pdfium
+    import pytesseract
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        image = pdf[page_index].render(scale=dpi / 72).to_pil()
+        return pytesseract.image_to_string(image, lang=lang)
+    finally:
+        pdf.close()
+
+
+class PDFOcr:
+    """OCR fallback for image-only PDF pages, run page-parallel across a process pool"""
+
+    def __init__(self, workers: int = 2, max_pages: int = 5, dpi: int = 200, lang: str = 'eng',
+                 page_timeout: float = 30, memory_limit_mb: int = 1024, cache_size: int = 512):
+        self.max_pages = max_pages
+        self.dpi = dpi
+        self.lang = lang
+        self.page_timeout = page_timeout
+        self._pool = WorkerPool(size=workers, memory_limit_mb=memory_limit_mb)
+        self._dispatcher = ThreadPoolExecutor(max_workers=workers)
+        self._cache = ResultCache(max_entries=cache_size)
+
+    def ocr_pages(self, file_content: bytes, pages: Dict[int, str]) -> Dict[int, str]:
+        """
+        OCR the given pages of a PDF.
+
+        Args:
+            file_content: PDF bytes
+            pages: Mapping of page index to page fingerprint
+
+        Returns:
+            Dict mapping page index to OCR text (pages that failed are omitted)
+        """
+        results = {}
+        pending = {}
+        for index in sorted(pages)[:self.max_pages]:
+            text = self._cache.get(pages[index])
+            if text is not None:
+                results[index] = text
+            else:
+                pending[index] = pages[index]
+
+        if len(pages) > self.max_pages:
+            logger.info(f"OCR limited to {self.max_pages} of {len(pages)} image-only pages")
+        if not pending:
+            return results
+        cached = len(results)
+
+        # Workers open the PDF from disk instead of receiving the bytes per page
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp.write(file_content)
+        try:
+            futures = {
+                index: self._dispatcher.submit(
+                    self._pool.run, ocr_page, (tmp.name, index, self.dpi, self.lang), self.page_timeout)
+                for index in pending
+            }
+            for index, future in futures.items():
+                try:
+                    text = future.result().strip()
+                except Exception as e:
+                    logger.warning(f"OCR failed for page {index + 1}: {str(e)}")
+                    continue
+                self._cache.set(pending[index], text)
+                results[index] = text
+        finally:
+            os.unlink(tmp.name)
+
+        logger.info(f"OCR processed {len(pending)} page(s), {cached} from cache")
+        return results
+
+
+_pdf_ocr = None
+_pdf_ocr_lock = threading.Lock()
+
+
+def get_pdf_ocr() -> Optional[PDFOcr]:
+    """Shared OCR engine configured from the environment, or None when disabled"""
+    global _pdf_ocr
+    if os.getenv('OCR_ENABLED', 'true').lower() != 'true':
+        return None
+    with _pdf_ocr_lock:
+        if _pdf_ocr is None:
+            _pdf_ocr = PDFOcr(
+                workers=int(os.getenv('OCR_WORKERS', '2')),
+                max_pages=int(os.getenv('OCR_MAX_PAGES', '5')),
+                dpi=int(os.getenv('OCR_DPI', '200')),
+                lang=os.getenv('OCR_LANG', 'eng'),
+                page_timeout=float(os.getenv('OCR_PAGE_TIMEOUT', '30')),
+                memory_limit_mb=int(os.getenv('OCR_MEMORY_MB', '1024')),
+                cache_size=int(os.getenv('OCR_CACHE_SIZE', '512')),
+            )
+        return _pdf_ocr
@@ -0,0 +1,164 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Leaf frames of threads that are blocked waiting for work rather than running
+IDLE_LEAVES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('socket.py', 'accept'),
+    ('socketserver.py', 'serve_forever'),
+    ('concurrent/futures/thread.py', '_worker'),
+}
+
+_SITE_MARKERS = ('site-packages' + os.sep, 'dist-packages' + os.sep)
+_STDLIB_DIR = os.path.dirname(os.__file__) + os.sep
+_APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to site-packages, the stdlib or this service"""
+    for marker in _SITE_MARKERS:
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+    for prefix in (_APP_DIR, _STDLIB_DIR):
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+class Profile:
+    """Sampled stacks, counted per unique stack (root first)"""
+
+    def __init__(self, stacks: Counter, samples: int, duration: float, interval: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.duration = duration
+        self.interval = interval
+
+    def collapsed(self) -> str:
+        """Collapsed-stack ('folded') text, one `frame;frame;frame count` line per stack,
+        ready for flamegraph.pl or speedscope"""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 15) -> Dict[str, Any]:
+        """Hottest functions by own and inclusive samples, plus the hottest stacks"""
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                inclusive[frame] += count
+
+        def ranked(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {'function': frame, 'samples': count, 'percent': round(100.0 * count / self.samples, 1)}
+                for frame, count in counter.most_common(top)
+            ]
+
+        return {
+            'duration_ms': round(self.duration * 1000, 1),
+            'interval_ms': round(self.interval * 1000, 2),
+            'samples': self.samples,
+            'top_own': ranked(own) if self.samples else [],
+            'top_inclusive': ranked(inclusive) if self.samples else [],
+            'top_stacks': [
+                {'stack': ';'.join(stack), 'samples': count}
+                for stack, count in self.stacks.most_common(min(top, 10))
+            ]
+        }
+
+
+class StackSampler:
+    """
+    Low-overhead sampling profiler for the live process.
+
+    A background thread reads every thread's current frame with
+    sys._current_frames() each `interval` seconds and counts the stacks, so
+    the profiled code runs unmodified (no tracing hooks). Pass `thread_id` to
+    sample a single thread, e.g. the one serving a request. Whole-process
+    profiles prefix each stack with the thread name and skip the calling
+    thread and threads idling in a wait, unless `include_idle` is set.
+
+    Only threads of this process are visible. Work handed to worker
+    processes is not sampled, and a thread blocked on a future shows the
+    wait, not the executor thread doing the work.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None, include_idle: bool = False):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.include_idle = include_idle
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._labels: Dict[Any, Tuple[str, Tuple[str, str]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._caller_id: Optional[int] = None
+
+    def start(self) -> 'StackSampler':
+        self._started = time.perf_counter()
+        self._caller_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        return Profile(self._stacks, self._samples, time.perf_counter() - self._started, self.interval)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self._record(frame, None)
+                    self._samples += 1
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id not in (own_id, self._caller_id):
+                    self._record(frame, names.get(thread_id, str(thread_id)))
+            # One sample per round, so percentages are relative to wall time
+            self._samples += 1
+
+    def _record(self, frame, thread_name: Optional[str]):
+        stack = []
+        leaf = None
+        while frame is not None:
+            label, location = self._label(frame.f_code)
+            if leaf is None:
+                leaf = location
+            stack.append(label)
+            frame = frame.f_back
+        if not self.include_idle and thread_name is not None and leaf in IDLE_LEAVES:
+            return
+        if thread_name is not None:
+            stack.append(thread_name.replace(';', ':'))
+        stack.reverse()
+        self._stacks[tuple(stack)] += 1
+
+    def _label(self, code) -> Tuple[str, Tuple[str, str]]:
+        cached = self._labels.get(code)
+        if cached is None:
+            path = _short_path(code.co_filename).replace(os.sep, '/')
+            cached = (f"{code.co_name} ({path}:{code.co_firstlineno})".replace(';', ':'), (path, code.co_name))
+            self._labels[code] = cached
+        return cached
+
+
+def profile_process(seconds: float, interval: float = 0.005, include_idle: bool = False) -> Profile:
+    """Sample all threads of this process for `seconds` (blocks the caller)"""
+    sampler = StackSampler(interval, include_idle=include_idle).start()
+    time.sleep(seconds)
+    return sampler.stop()
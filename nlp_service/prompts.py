@@ -0,0 +1,220 @@
+import hashlib
+from typing import Any
+
+
+class Prompt:
+    """A rendered prompt: the template's static prefix followed by a per-request suffix"""
+
+    def __init__(self, template: 'PromptTemplate', suffix: str):
+        self.template = template
+        self.prefix = template.prefix
+        self.suffix = suffix
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.prefix or item in self.suffix
+
+
+class PromptTemplate:
+    """
+    Versioned LLM prompt split into a static prefix and a dynamic suffix.
+
+    The prefix (role, rules, output schema) is identical on every call and
+    comes first, so the provider's implicit prefix caching can reuse it; the
+    suffix (the CV, the job description) changes per request. The fingerprint changes whenever
+    the name, version or text changes, and is part of every result cache key,
+    so editing a template invalidates stale results.
+    """
+
+    def __init__(self, name: str, version: int, prefix: str, suffix: str):
+        self.name = name
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        digest = hashlib.sha256(f"{name}\0{version}\0{prefix}\0{suffix}".encode('utf-8')).hexdigest()
+        self.fingerprint = f"{name}-v{version}-{digest[:12]}"
+
+    def render(self, **fields: Any) -> Prompt:
+        return Prompt(self, self.suffix.format(**fields))
+
+
+ANALYZE_CV = PromptTemplate('analyze_cv', 2, prefix="""
+You are an expert CV/Resume analyst. Analyze the document given at the end of this prompt and determine if it is a valid CV/Resume.
+
+STEP 1 - VALIDATION:
+First, determine if this document is actually a CV/Resume. A valid CV should contain at least 3 of these sections:
+- Contact Information (name, email, phone, address)
+- Work Experience / Professional Experience
+- Education / Academic Background
+- Skills / Technical Skills / Competencies
+- Professional Summary / Objective / Profile
+
+If the document does NOT appear to be a CV/Resume (e.g., it's a random document, article, letter, or contains mostly irrelevant content), respond with ONLY this JSON:
+{
+    "is_valid_cv": false,
+    "error": "Your document does not look like a CV",
+    "details": "Missing critical sections like experience, education, or contact information. Please upload a proper CV/Resume document."
+}
+
+STEP 2 - ANALYSIS (only if it's a valid CV):
+If it IS a valid CV, analyze it thoroughly and provide this JSON structure:
+
+{
+    "is_valid_cv": true,
+    "sections_found": ["contact", "experience", "education", "skills", "summary", "certifications", "interests", "projects"],
+    "missing_sections": ["list of important sections not found"],
+    "extracted_sections": {
+        "contact": {
+            "name": "extracted name or null",
+            "email": "extracted email or null",
+            "phone": "extracted phone or null",
+            "location": "extracted location or null",
+            "linkedin": "extracted linkedin or null"
+        },
+        "background": "Professional summary/objective text if found, or null",
+        "experience": [
+            {
+                "title": "job title",
+                "company": "company name",
+                "duration": "time period",
+                "description": "key responsibilities and achievements"
+            }
+        ],
+        "education": [
+            {
+                "degree": "degree name",
+                "institution": "school/university name",
+                "year": "graduation year or period",
+                "details": "additional details if any"
+            }
+        ],
+        "skills": ["skill1", "skill2", "skill3"],
+        "certifications": ["certification1", "certification2"],
+        "interests": "interests/hobbies text if found, or null"
+    },
+    "overall_score": 85,
+    "ats_compatibility_score": 75,
+    "strengths": [
+        "specific strength 1",
+        "specific strength 2",
+        "specific strength 3"
+    ],
+    "improvements": [
+        {
+            "section": "section name",
+            "issue": "what's wrong or missing",
+            "suggestion": "specific actionable advice",
+            "priority": "high/medium/low"
+        }
+    ],
+    "formatting_issues": ["list of formatting problems if any"],
+    "recommended_keywords": ["relevant keyword 1", "relevant keyword 2"]
+}
+
+SCORING GUIDELINES:
+- Overall Score (0-100): Based on completeness, clarity, and professionalism
+- ATS Compatibility Score (0-100): Based on formatting, keyword usage, and structure
+
+Return ONLY valid JSON, no markdown formatting or code blocks.
+""", suffix="""
+DOCUMENT CONTENT:
+{cv_text}
+""")
+
+REANALYZE_CV = PromptTemplate('reanalyze_cv', 1, prefix="""
+You are an expert CV/Resume analyst. A CV was analyzed before, and has since been lightly edited. Given the previous analysis and the changes at the end of this prompt, return the analysis of the edited CV.
+
+Instructions:
+1. Start from the previous analysis and update only what the changes affect: extracted sections, scores, strengths, improvements, formatting issues and keywords
+2. Lines starting with "-" were removed from the CV and lines starting with "+" were added
+3. Keep exactly the same JSON structure as the previous analysis, with "is_valid_cv": true
+
+Return ONLY valid JSON, no markdown formatting or code blocks.
+""", suffix="""
+PREVIOUS ANALYSIS:
+{previous_analysis}
+
+CHANGES TO THE CV:
+{changes}
+""")
+
+MATCH_JOB = PromptTemplate('match_job', 2, prefix="""
+You are an expert career counselor and ATS specialist. Analyze how well the CV given at the end of this prompt matches the job description.
+
+Provide analysis as JSON:
+{
+    "match_score": 85,
+    "verdict": "strong",
+    "matching_skills": ["Python", "React", "SQL"],
+    "missing_skills": ["AWS", "Docker"],
+    "suggestions": [
+        "Add AWS certification to strengthen cloud skills",
+        "Include Docker projects in your experience section",
+        "Quantify your achievements with metrics"
+    ],
+    "strengths": [
+        "5+ years Python experience matches senior requirement",
+        "React skills align with frontend needs",
+        "Strong database background"
+    ]
+}
+
+Instructions:
+- match_score: 0-100 based on skills, experience, qualifications match
+- verdict: "strong" (80-100), "moderate" (60-79), "weak" (0-59)
+- matching_skills: Skills candidate HAS that job requires (list 5-15 skills)
+- missing_skills: Skills job requires but candidate lacks (list 3-10 skills)
+- suggestions: Specific, actionable CV improvements for THIS job (3-7 suggestions)
+- strengths: Candidate's strongest points for THIS role (3-5 strengths)
+
+Be honest but constructive. Return ONLY valid JSON, no markdown formatting or code blocks.
+""", suffix="""
+JOB DESCRIPTION:
+{job_description}
+
+CANDIDATE'S CV:
+{cv_text}
+""")
+
+IMPROVE_CV = PromptTemplate('improve_cv', 2, prefix="""
+You are a professional CV writer. Given the CV and improvement suggestions at the end of this prompt, rewrite the CV to be better.
+
+Instructions:
+1. Rewrite weak sections to be more impactful
+2. Add any critical missing sections with professional content
+3. Use action verbs and quantifiable achievements
+4. Ensure ATS-friendly formatting
+5. Keep it professional and concise
+
+Return the improved CV text in a clean, well-structured format.
+""", suffix="""
+Original CV:
+{cv_text}
+
+Improvements to apply:
+{improvements}
+""")
+
+PATCH_SECTIONS = PromptTemplate('patch_sections', 2, prefix="""
+You are a professional CV writer. Rewrite ONLY the CV sections given at the end of this prompt, applying the improvements listed with each section.
+
+Instructions:
+1. Keep each section's header line and the candidate's facts; do not invent employers, dates or degrees
+2. Use action verbs and quantifiable achievements
+3. Keep ATS-friendly plain-text formatting
+4. Apply the general improvements where relevant to these sections
+
+Return ONLY valid JSON, no markdown formatting or code blocks:
+{"patches": [{"id": 0, "replacement": "full rewritten text of section 0"}]}
+""", suffix="""
+General improvements:
+{general}
+
+{sections}
+""")
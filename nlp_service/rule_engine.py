@@ -0,0 +1,218 @@
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules', 'cv_rules.json')
+SCOPES = ('any', 'header', 'line')
+# Extra characters a 'header' scoped hit's line may have beyond the pattern itself
+HEADER_SLACK = 15
+
+
+class Rule:
+    """
+    A declarative check.
+
+    Fields in the rules file: id, category, pattern (or patterns) and/or
+    regex, scope ('any', 'header' to only match short header-like lines, or
+    'line' to only match lines holding nothing else but a trailing colon),
+    severity, message, and optional extras (e.g. 'section', 'replacement')
+    that are passed through to analyzers.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.id = spec['id']
+        self.category = spec['category']
+        patterns = spec.get('patterns') or ([spec['pattern']] if 'pattern' in spec else [])
+        self.patterns = [pattern.lower() for pattern in patterns]
+        # Layout checks that are not phrases, e.g. runs of spaces
+        self.regex = spec.get('regex')
+        if not self.patterns and not self.regex:
+            raise ValueError(f"Rule {self.id}: needs a pattern or a regex")
+        self.scope = spec.get('scope', 'any')
+        if self.scope not in SCOPES:
+            raise ValueError(f"Rule {self.id}: unknown scope {self.scope!r}")
+        self.severity = spec.get('severity', 'info')
+        self.message = spec.get('message', '')
+        self.extra = {key: value for key, value in spec.items()
+                      if key not in ('id', 'category', 'pattern', 'patterns', 'regex', 'scope', 'severity', 'message')}
+
+
+class RuleHits:
+    """All rule matches in one document, in text order"""
+
+    def __init__(self, hits: List[Dict[str, Any]], rules: List[Rule]):
+        self.hits = hits
+        self._rules = rules
+        self._by_category: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for hit in hits:
+            self._by_category[hit['category']].append(hit)
+
+    def by_category(self, category: str) -> List[Dict[str, Any]]:
+        return self._by_category.get(category, [])
+
+    def rule_ids(self, category: str) -> set:
+        """Ids of the rules in a category that matched at least once"""
+        return {hit['rule_id'] for hit in self.by_category(category)}
+
+    def rules(self, category: str) -> List[Rule]:
+        """All rules of a category in the rule set the document was scanned with"""
+        return [rule for rule in self._rules if rule.category == category]
+
+
+class RuleEngine:
+    """
+    Compiles a rule set into one matcher that scans each document once.
+
+    All rule patterns are literal phrases matched case-insensitively at word
+    boundaries. They are joined into a single lookahead alternation, so every
+    position is tested once and overlapping phrases starting at different
+    positions are all found. Where one phrase is a prefix of another (e.g.
+    'experience' and 'experience summary'), the alternation reports the longest
+    and a precomputed prefix map adds the shorter ones. Rules with a `regex`
+    join the same matcher as named lookahead alternatives, so they cost no
+    extra pass either. Where a phrase and a regex match at the same position,
+    the phrase wins.
+
+    The rules file is reloaded when its modification time changes. An invalid
+    file is logged and the previous rule set stays active.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._compiled: Optional[Dict[str, Any]] = None
+        self._reload_if_changed()
+
+    @property
+    def rules(self) -> List[Rule]:
+        return self._current()['rules']
+
+    def scan(self, text: str) -> RuleHits:
+        compiled = self._current()
+        line_starts = [0] + [match.end() for match in re.finditer('\n', text)]
+        hits = []
+        regex_ends: Dict[str, int] = {}
+
+        for match in compiled['matcher'].finditer(text):
+            if match.group(1) is not None:
+                start = match.start(1)
+                candidates = [(matched, rule) for matched in compiled['prefixes'][match.group(1).lower()]
+                              for rule in compiled['by_phrase'][matched]]
+            else:
+                rule = compiled['by_group'][match.lastgroup]
+                start, end = match.span(match.lastgroup)
+                # The lookahead matches again at every position inside a run; report the run once
+                if start == end or start < regex_ends.get(rule.id, 0):
+                    continue
+                regex_ends[rule.id] = end
+                candidates = [(text[start:end], rule)]
+            line_index = bisect.bisect_right(line_starts, start) - 1
+            line_start = line_starts[line_index]
+            line_end = line_starts[line_index + 1] - 1 if line_index + 1 < len(line_starts) else len(text)
+            line = text[line_start:line_end].strip()
+
+            for matched, rule in candidates:
+                if rule.scope == 'header' and len(line) > len(matched) + HEADER_SLACK:
+                    continue
+                if rule.scope == 'line' and len(line.rstrip(':').rstrip()) != len(matched):
+                    continue
+                hits.append(dict(
+                    rule.extra,
+                    rule_id=rule.id,
+                    category=rule.category,
+                    severity=rule.severity,
+                    message=rule.message,
+                    text=text[start:start + len(matched)],
+                    start=start,
+                    end=start + len(matched),
+                    line=line_index + 1,
+                    column=start - line_start + 1,
+                ))
+        return RuleHits(hits, compiled['rules'])
+
+    def _current(self) -> Dict[str, Any]:
+        self._reload_if_changed()
+        return self._compiled
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if self._compiled is None:
+                raise ValueError(f"Rules file not found: {self.path}") from e
+            return
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path) as f:
+                    spec = json.load(f)
+                compiled = self.compile([Rule(rule) for rule in spec['rules']])
+            except (ValueError, KeyError, TypeError, re.error) as e:
+                if self._compiled is None:
+                    raise ValueError(f"Invalid rules file {self.path}: {str(e)}") from e
+                logger.error(f"Ignoring invalid rules file {self.path}: {str(e)}")
+                self._mtime = mtime
+                return
+            self._compiled = compiled
+            self._mtime = mtime
+            logger.info(f"Loaded {len(compiled['rules'])} rules from {self.path}")
+
+    @staticmethod
+    def compile(rules: List[Rule]) -> Dict[str, Any]:
+        """Build the combined matcher and the phrase -> rules / prefix / regex group lookup tables"""
+        ids = [rule.id for rule in rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate rule ids")
+
+        by_phrase: Dict[str, List[Rule]] = defaultdict(list)
+        for rule in rules:
+            for pattern in rule.patterns:
+                by_phrase[pattern].append(rule)
+
+        def boundary_after(phrase: str, length: int) -> bool:
+            return length == len(phrase) or not phrase[length].isalnum()
+
+        phrases = sorted(by_phrase, key=len, reverse=True)
+        prefixes = {
+            phrase: [other for other in phrases
+                     if phrase.startswith(other) and boundary_after(phrase, len(other))]
+            for phrase in phrases
+        }
+        alternation = '|'.join(re.escape(phrase) for phrase in phrases) or '(?!)'
+        # A first-character class in front lets most positions fail before the alternation is tried
+        first_chars = ''.join(sorted({re.escape(phrase[0]) for phrase in phrases})) or 'x'
+        matcher = rf'(?<![a-z0-9])(?=[{first_chars}])(?=({alternation})(?![a-z0-9]))'
+
+        by_group = {}
+        for index, rule in enumerate(rule for rule in rules if rule.regex):
+            # Compiled alone first so a bad regex is reported against its rule
+            re.compile(rule.regex)
+            by_group[f'regex_{index}'] = rule
+            matcher += rf'|(?=(?P<regex_{index}>{rule.regex}))'
+        return {'rules': rules, 'by_phrase': dict(by_phrase), 'prefixes': prefixes, 'by_group': by_group,
+                'matcher': re.compile(matcher, re.IGNORECASE)}
+
+
+_rule_engine: Optional[RuleEngine] = None
+_rule_engine_lock = threading.Lock()
+
+
+def get_rule_engine() -> RuleEngine:
+    """Shared engine for the rules file in RULES_PATH (created on first use)"""
+    global _rule_engine
+    with _rule_engine_lock:
+        if _rule_engine is None:
+            _rule_engine = RuleEngine(os.getenv('RULES_PATH') or DEFAULT_RULES_PATH)
+        return _rule_engine
@@ -0,0 +1,452 @@
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from keyword_extractor import KeywordExtractor
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+STOPWORDS = frozenset(
+    'a an and are as at be been by for from has have in is it its of on or our that the their '
+    'they this to was we were will with you your'.split()
+)
+MAX_TOKEN_LENGTH = 40
+# Skill hits are indexed as terms in their own namespace, separate from BM25 text terms
+SKILL_PREFIX = '\x00'
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens, without stopwords and overlong tokens (URLs, hashes)"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower())
+            if token not in STOPWORDS and len(token) <= MAX_TOKEN_LENGTH]
+
+
+def _pack_strings(name: str, values: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Length-prefixed strings as two arrays: the UTF-8 bytes of all values
+    concatenated (`name`) and the byte offset of each value (`name`_offsets,
+    len(values) + 1 entries). Values may contain any character.
+    """
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {name: np.frombuffer(b''.join(encoded), dtype=np.uint8), f"{name}_offsets": offsets}
+
+
+def _unpack_strings(data, name: str, count: Optional[int] = None) -> List[str]:
+    """
+    Inverse of _pack_strings on a loaded .npz. Files written before offsets
+    were stored hold newline-joined values; `count` disambiguates a single
+    empty string from no strings there.
+    """
+    raw = data[name].tobytes()
+    if f"{name}_offsets" not in data.files:
+        if count == 0 or (count is None and not raw):
+            return []
+        return raw.decode('utf-8').split('\n')
+    offsets = data[f"{name}_offsets"].tolist()
+    return [raw[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+
+class _Segment:
+    """Immutable posting lists in CSR form: docs/tfs of terms[i] are at offsets[i]:offsets[i + 1]"""
+
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, docs: np.ndarray, tfs: np.ndarray,
+                 name: Optional[str] = None):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.name = name
+
+    @classmethod
+    def build(cls, term_ids: np.ndarray, docs: np.ndarray, tfs: np.ndarray,
+              name: Optional[str] = None) -> '_Segment':
+        """Group postings by term; a stable sort keeps each list in doc order"""
+        order = np.argsort(term_ids, kind='stable')
+        term_ids, docs, tfs = term_ids[order], docs[order], tfs[order]
+        terms, starts = np.unique(term_ids, return_index=True)
+        offsets = np.append(starts, len(term_ids)).astype(np.int64)
+        return cls(terms.astype(np.int32), offsets, docs.astype(np.int32),
+                   np.minimum(tfs, np.iinfo(np.uint16).max).astype(np.uint16), name)
+
+    def postings(self, term_id: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        i = np.searchsorted(self.terms, term_id)
+        if i == len(self.terms) or self.terms[i] != term_id:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    def term_per_posting(self) -> np.ndarray:
+        return np.repeat(self.terms, np.diff(self.offsets))
+
+    @classmethod
+    def load(cls, path: str, name: str) -> '_Segment':
+        with np.load(path) as data:
+            return cls(data['terms'], data['offsets'], data['docs'], data['tfs'], name)
+
+    def save(self, path: str):
+        _atomic_savez(path, terms=self.terms, offsets=self.offsets, docs=self.docs, tfs=self.tfs)
+
+
+def _atomic_savez(path: str, **arrays: np.ndarray):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+class CandidateIndex:
+    """
+    Inverted index over stored CVs for finding the best candidates for a job.
+
+    Scores combine BM25 over the CV text with the fraction of the job's
+    KeywordExtractor skills that the CV also has. Postings are kept in
+    immutable numpy CSR segments plus an in-memory delta for recent additions.
+    The delta becomes a segment every `flush_every` additions, and segments are
+    merged once there are more than `max_segments`. Deletes are tombstones,
+    and dead documents are dropped from the postings at the next merge.
+
+    With a `directory`, segments and the document table are persisted as .npz
+    files and loaded on startup. Additions and deletes become durable at the
+    next flush, which runs once `flush_every` of them are pending, so callers
+    should replay recent adds and deletes (both are idempotent per
+    candidate_id) after a crash.
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_every: int = 500,
+                 max_segments: int = 8, k1: float = 1.2, b: float = 0.75):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.max_segments = max_segments
+        self.k1 = k1
+        self.b = b
+        self._keyword_extractor = KeywordExtractor()
+        self._lock = threading.RLock()
+
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._df = np.zeros(0, dtype=np.int32)
+        self._candidate_ids: List[str] = []
+        self._doc_ids: Dict[str, int] = {}
+        self._doc_skills: List[Tuple[str, ...]] = []
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._segments: List[_Segment] = []
+        self._next_segment = 0
+        self._delta: Tuple[List[int], List[int], List[int]] = ([], [], [])
+        self._delta_docs = 0
+        self._delta_segment: Optional[_Segment] = None
+        self._unflushed_deletes = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self._meta_path()):
+                self._load()
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def add(self, candidate_id: str, text: str, skills: Optional[List[str]] = None):
+        """Index (or re-index) a candidate's CV text and skill hits"""
+        if skills is None:
+            skills = self._keyword_extractor.extract(text)
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        counts.update({SKILL_PREFIX + skill: 1 for skill in skills})
+
+        with self._lock:
+            if candidate_id in self._doc_ids:
+                self._tombstone(candidate_id)
+            doc = len(self._candidate_ids)
+            self._candidate_ids.append(candidate_id)
+            self._doc_ids[candidate_id] = doc
+            self._doc_skills.append(tuple(skills))
+            self._ensure_doc_capacity(doc + 1)
+            self._doc_len[doc] = len(tokens)
+            self._alive[doc] = True
+
+            doc_terms = [self._term_id(term) for term in counts]
+            # Terms are unique within a document, so a fancy-index increment is exact
+            self._df[np.array(doc_terms, dtype=np.int64)] += 1
+            term_ids, docs, tfs = self._delta
+            term_ids.extend(doc_terms)
+            docs.extend([doc] * len(doc_terms))
+            tfs.extend(counts.values())
+            self._delta_docs += 1
+            self._delta_segment = None
+
+            if self._delta_docs + self._unflushed_deletes >= self.flush_every:
+                self.flush()
+
+    def delete(self, candidate_id: str) -> bool:
+        """Remove a candidate; returns False if it was not indexed"""
+        with self._lock:
+            if candidate_id not in self._doc_ids:
+                return False
+            self._tombstone(candidate_id)
+            self._unflushed_deletes += 1
+            if self._unflushed_deletes >= self.flush_every:
+                self.flush()
+            return True
+
+    def search(self, job_description: str, top_k: int = 20, skill_weight: float = 0.4,
+               candidate_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Top candidates for a job description, optionally only among `candidate_ids`
+        (e.g. the result of a profile filter).
+
+        The score is (1 - skill_weight) * BM25 (normalized by the best BM25 in
+        the pool) + skill_weight * fraction of job skills the candidate has.
+        """
+        query_terms = set(tokenize(job_description))
+        job_skills = self._keyword_extractor.extract(job_description)
+
+        with self._lock:
+            n_docs = len(self._candidate_ids)
+            alive_count = len(self._doc_ids)
+            if not alive_count:
+                return []
+            segments = self._all_segments()
+            avg_len = max(1.0, float(self._doc_len[:n_docs][self._alive[:n_docs]].mean()))
+
+            doc_parts, weight_parts = [], []
+            for term in query_terms:
+                term_id = self._vocab.get(term)
+                if term_id is None or not self._df[term_id]:
+                    continue
+                df = self._df[term_id]
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for docs, tfs in self._postings(segments, term_id):
+                    tfs = tfs.astype(np.float32)
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[docs] / avg_len)
+                    doc_parts.append(docs)
+                    weight_parts.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+            bm25 = self._accumulate(doc_parts, weight_parts, n_docs)
+
+            skill_docs = []
+            for skill in job_skills:
+                term_id = self._vocab.get(SKILL_PREFIX + skill)
+                if term_id is not None:
+                    skill_docs.extend(docs for docs, _ in self._postings(segments, term_id))
+            overlap = self._accumulate(skill_docs, None, n_docs) / max(1, len(job_skills))
+
+            alive = self._alive[:n_docs]
+            if candidate_ids is not None:
+                allowed = np.zeros(n_docs, dtype=bool)
+                allowed[[self._doc_ids[cid] for cid in candidate_ids if cid in self._doc_ids]] = True
+                alive = alive & allowed
+            best = bm25[alive].max() if alive.any() else 0.0
+            scores = (1 - skill_weight) * (bm25 / best if best > 0 else bm25) + skill_weight * overlap
+            scores[~alive] = 0.0
+
+            matches = np.flatnonzero(scores > 0)
+            if len(matches) > top_k:
+                matches = matches[np.argpartition(-scores[matches], top_k - 1)[:top_k]]
+            matches = matches[np.argsort(-scores[matches], kind='stable')]
+
+            job_skill_set = set(job_skills)
+            return [{
+                'candidate_id': self._candidate_ids[doc],
+                'score': round(float(scores[doc]), 4),
+                'bm25': round(float(bm25[doc]), 4),
+                'skill_overlap': round(float(overlap[doc]), 4),
+                'matching_skills': sorted(job_skill_set.intersection(self._doc_skills[doc])),
+            } for doc in matches]
+
+    def flush(self):
+        """Turn the in-memory delta into a segment, merging segments when there are too many"""
+        with self._lock:
+            self._seal_delta()
+            if len(self._segments) > self.max_segments:
+                self.merge()
+            elif self.directory:
+                self._save_meta()
+            self._unflushed_deletes = 0
+
+    def merge(self):
+        """Merge all segments into one, dropping deleted documents and renumbering the rest"""
+        with self._lock:
+            self._seal_delta()
+            n_docs = len(self._candidate_ids)
+            alive = self._alive[:n_docs]
+            new_ids = np.cumsum(alive, dtype=np.int64) - 1
+
+            term_ids = np.concatenate([seg.term_per_posting() for seg in self._segments] or [np.zeros(0, np.int32)])
+            docs = np.concatenate([seg.docs for seg in self._segments] or [np.zeros(0, np.int32)])
+            tfs = np.concatenate([seg.tfs for seg in self._segments] or [np.zeros(0, np.uint16)])
+            keep = alive[docs]
+            term_ids, docs, tfs = term_ids[keep], new_ids[docs[keep]], tfs[keep]
+
+            old_names = [seg.name for seg in self._segments]
+            merged = _Segment.build(term_ids, docs, tfs, f"segment_{self._next_segment:06d}.npz")
+            self._next_segment += 1
+            self._segments = [merged]
+
+            self._candidate_ids = [cid for cid, live in zip(self._candidate_ids, alive) if live]
+            self._doc_skills = [skills for skills, live in zip(self._doc_skills, alive) if live]
+            self._doc_len = self._doc_len[:n_docs][alive].copy()
+            self._alive = np.ones(len(self._candidate_ids), dtype=bool)
+            self._doc_ids = {cid: doc for doc, cid in enumerate(self._candidate_ids)}
+            self._df = np.bincount(term_ids, minlength=len(self._terms)).astype(np.int32)
+
+            self._unflushed_deletes = 0
+            if self.directory:
+                merged.save(os.path.join(self.directory, merged.name))
+                self._save_meta()
+                for name in old_names:
+                    path = os.path.join(self.directory, name)
+                    if name and os.path.exists(path):
+                        os.remove(path)
+            logger.info(f"Merged candidate index: {len(self._candidate_ids)} documents, {len(docs)} postings")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'candidates': len(self._doc_ids),
+                'deleted_pending_merge': len(self._candidate_ids) - len(self._doc_ids),
+                'terms': len(self._terms),
+                'segments': len(self._segments),
+                'postings': int(sum(len(seg.docs) for seg in self._segments)) + len(self._delta[0]),
+                'unflushed_candidates': self._delta_docs,
+                'unflushed_deletes': self._unflushed_deletes,
+            }
+
+    def _seal_delta(self):
+        """Move the in-memory delta into a new (persisted) segment"""
+        if not self._delta_docs:
+            return
+        segment = self._build_delta_segment()
+        segment.name = f"segment_{self._next_segment:06d}.npz"
+        self._next_segment += 1
+        self._segments.append(segment)
+        self._delta = ([], [], [])
+        self._delta_docs = 0
+        self._delta_segment = None
+        if self.directory:
+            segment.save(os.path.join(self.directory, segment.name))
+
+    def _tombstone(self, candidate_id: str):
+        doc = self._doc_ids.pop(candidate_id)
+        self._alive[doc] = False
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._vocab.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            self._vocab[term] = term_id
+            self._terms.append(term)
+            if term_id >= len(self._df):
+                self._df = np.concatenate([self._df, np.zeros(max(1024, len(self._df)), dtype=np.int32)])
+        return term_id
+
+    def _ensure_doc_capacity(self, size: int):
+        if size > len(self._doc_len):
+            grow = max(1024, len(self._doc_len))
+            self._doc_len = np.concatenate([self._doc_len, np.zeros(grow, dtype=np.float32)])
+            self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+
+    def _build_delta_segment(self) -> _Segment:
+        if self._delta_segment is None:
+            term_ids, docs, tfs = self._delta
+            self._delta_segment = _Segment.build(np.array(term_ids, dtype=np.int32),
+                                                 np.array(docs, dtype=np.int32),
+                                                 np.array(tfs, dtype=np.int64))
+        return self._delta_segment
+
+    def _all_segments(self) -> List[_Segment]:
+        return self._segments + ([self._build_delta_segment()] if self._delta_docs else [])
+
+    def _postings(self, segments: List[_Segment], term_id: int):
+        for segment in segments:
+            postings = segment.postings(term_id)
+            if postings is not None:
+                yield postings
+
+    def _accumulate(self, doc_parts: List[np.ndarray], weight_parts: Optional[List[np.ndarray]],
+                    n_docs: int) -> np.ndarray:
+        """Sum per-document weights (or counts) in a single pass"""
+        if not doc_parts:
+            return np.zeros(n_docs, dtype=np.float64)
+        weights = np.concatenate(weight_parts) if weight_parts is not None else None
+        return np.bincount(np.concatenate(doc_parts), weights=weights, minlength=n_docs).astype(np.float64)
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, 'meta.npz')
+
+    def _save_meta(self):
+        n_docs = len(self._candidate_ids)
+        _atomic_savez(
+            self._meta_path(),
+            **_pack_strings('terms', self._terms),
+            df=self._df[:len(self._terms)],
+            **_pack_strings('candidate_ids', self._candidate_ids),
+            **_pack_strings('doc_skills', [skill for skills in self._doc_skills for skill in skills]),
+            doc_skill_counts=np.array([len(skills) for skills in self._doc_skills], dtype=np.int32),
+            doc_len=self._doc_len[:n_docs],
+            alive=self._alive[:n_docs],
+            **_pack_strings('segments', [seg.name for seg in self._segments]),
+            next_segment=np.array(self._next_segment),
+        )
+
+    def _load(self):
+        with np.load(self._meta_path()) as meta:
+            self._df = meta['df'].copy()
+            self._terms = _unpack_strings(meta, 'terms', len(self._df))
+            self._doc_len = meta['doc_len'].copy()
+            self._candidate_ids = _unpack_strings(meta, 'candidate_ids', len(self._doc_len))
+            self._doc_skills = self._load_doc_skills(meta)
+            self._alive = meta['alive'].copy()
+            segment_names = _unpack_strings(meta, 'segments')
+            self._next_segment = int(meta['next_segment'])
+        self._vocab = {term: term_id for term_id, term in enumerate(self._terms)}
+        self._doc_ids = {cid: doc for doc, cid in enumerate(self._candidate_ids) if self._alive[doc]}
+        self._segments = [_Segment.load(os.path.join(self.directory, name), name) for name in segment_names]
+        logger.info(f"Loaded candidate index: {len(self._doc_ids)} candidates, {len(self._segments)} segment(s)")
+
+    def _load_doc_skills(self, meta) -> List[Tuple[str, ...]]:
+        if 'doc_skill_counts' not in meta.files:
+            # Older tables joined each document's skills with '|'
+            joined = _unpack_strings(meta, 'doc_skills', len(meta['doc_len']))
+            return [tuple(filter(None, skills.split('|'))) for skills in joined]
+        skills = _unpack_strings(meta, 'doc_skills')
+        ends = np.cumsum(meta['doc_skill_counts']).tolist()
+        return [tuple(skills[start:end]) for start, end in zip([0] + ends, ends)]
+
+
+if __name__ == '__main__':
+    # Benchmark: python search_index.py [n_candidates]
+    n_candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(0)
+    extractor = KeywordExtractor()
+    skills = sorted(extractor.tech_skills | extractor.soft_skills)
+    words = [f"word{i}" for i in range(30000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+
+    index = CandidateIndex(flush_every=5000)
+    start = time.perf_counter()
+    for i in range(n_candidates):
+        cv_skills = rng.sample(skills, 12)
+        body = rng.choices(words, weights, k=350)
+        index.add(f"cv-{i}", ' '.join(body + cv_skills), cv_skills)
+    index.flush()
+    index.merge()
+    print(f"Indexed {n_candidates} CVs in {time.perf_counter() - start:.1f}s: {index.stats()}")
+
+    timings = []
+    for _ in range(50):
+        job = ' '.join(rng.choices(words, weights, k=120) + rng.sample(skills, 8))
+        start = time.perf_counter()
+        results = index.search(job, top_k=20)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"Search top-20: p50 {timings[len(timings) // 2]:.1f} ms, p95 {timings[int(len(timings) * 0.95)]:.1f} ms")
+    print(results[:3])
@@ -1,46 +1,90 @@
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+from rule_engine import Rule, RuleEngine, RuleHits, get_rule_engine
 
 class SectionDetector:
-    """Detect CV sections and identify missing ones"""
+    """
+    Detect CV sections and identify missing ones.
+
+    Sections and their header phrases come from the 'section' and
+    'standard_header' rules of the shared RuleEngine (rules/cv_rules.json),
+    so editing the rules file changes detection, segmentation and header
+    lookup alike. Rules marked `"header": false` (e.g. "email", "degree")
+    signal a section in body text but never make a line a header; rules
+    marked `"required": true` make their section required.
+    """
     
-    def __init__(self):
-        self.required_sections = {
-            'contact': ['contact', 'personal information', 'email', 'phone'],
-            'summary': ['summary', 'objective', 'profile', 'about'],
-            'experience': ['experience', 'work history', 'employment', 'work experience'],
-            'education': ['education', 'academic', 'qualifications', 'degree'],
-            'skills': ['skills', 'technical skills', 'competencies', 'expertise'],
-        }
-        
-        self.optional_sections = {
-            'certifications': ['certifications', 'certificates', 'licenses'],
-            'projects': ['projects', 'portfolio'],
-            'awards': ['awards', 'honors', 'achievements'],
-            'publications': ['publications', 'papers', 'articles'],
-            'languages': ['languages', 'language proficiency'],
-            'references': ['references', 'referees']
-        }
+    def __init__(self, engine: Optional[RuleEngine] = None):
+        self._engine = engine
+        # (rule list the map was built from, section name -> required flag and (keyword, whole line) pairs)
+        self._section_map: Tuple[Optional[List[Rule]], Dict[str, Dict[str, Any]]] = (None, {})
+    
+    @property
+    def required_sections(self) -> List[str]:
+        return [name for name, section in self._sections().items() if section['required']]
     
-    def detect(self, text: str) -> Dict[str, bool]:
-        """Detect which sections are present in the CV"""
-        text_lower = text.lower()
-        detected = {}
+    @property
+    def optional_sections(self) -> List[str]:
+        return [name for name, section in self._sections().items() if not section['required']]
+    
+    def detect(self, text: str, hits: Optional[RuleHits] = None) -> Dict[str, bool]:
+        """
+        Detect which sections are present in the CV, from the 'section' rule hits.
+        Pass `hits` to reuse a scan shared with the other analyzers.
+        """
+        hits = hits or self._rule_engine().scan(text)
+        found = {hit['section'] for hit in hits.by_category('section')}
+        return {name: name in found for name in self._sections()}
+    
+    def segment(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Split the CV into sections using header lines.
         
-        # Check required sections
-        for section_name, keywords in self.required_sections.items():
-            detected[section_name] = any(keyword in text_lower for keyword in keywords)
+        Returns:
+            List of {'name', 'start', 'end'} character offsets into text, in
+            document order. Text before the first header is named 'header'.
+        """
+        segments = []
+        current_name, current_start = 'header', 0
+        offset = 0
         
-        # Check optional sections
-        for section_name, keywords in self.optional_sections.items():
-            detected[section_name] = any(keyword in text_lower for keyword in keywords)
+        for line in text.splitlines(keepends=True):
+            name = self.header_section(line)
+            if name and offset > current_start:
+                segments.append({'name': current_name, 'start': current_start, 'end': offset})
+            if name:
+                current_name, current_start = name, offset
+            offset += len(line)
         
-        return detected
+        if offset > current_start:
+            segments.append({'name': current_name, 'start': current_start, 'end': offset})
+        return segments
+    
+    def canonical_section(self, label: str) -> str:
+        """Map a free-form section label (e.g. 'Work Experience') to a section name, or ''"""
+        label = label.strip().lower()
+        for section_name, section in self._sections().items():
+            if section_name in label or any(label == keyword if whole_line else keyword in label
+                                            for keyword, whole_line in section['keywords']):
+                return section_name
+        return ''
+    
+    def header_section(self, line: str) -> str:
+        """Return the section name if the line looks like a section header, else ''"""
+        stripped = line.strip().strip(':').strip().lower()
+        if not stripped or len(stripped) > 40:
+            return ''
+        
+        for section_name, section in self._sections().items():
+            for keyword, whole_line in section['header_keywords']:
+                if stripped == keyword if whole_line else (keyword in stripped and len(stripped) <= len(keyword) + 15):
+                    return section_name
+        return ''
     
     def find_missing(self, detected_sections: Dict[str, bool]) -> List[str]:
         """Find missing critical sections"""
         missing = []
         
-        for section_name in self.required_sections.keys():
+        for section_name in self.required_sections:
             if section_name in detected_sections and not detected_sections[section_name]:
                 missing.append(section_name)
         
@@ -69,3 +113,28 @@ class SectionDetector:
             score += 15
         
         return min(100, score)
+    
+    def _rule_engine(self) -> RuleEngine:
+        return self._engine or get_rule_engine()
+    
+    def _sections(self) -> Dict[str, Dict[str, Any]]:
+        """Section name -> required flag, keywords and header keywords, rebuilt when the rules reload"""
+        rules = self._rule_engine().rules
+        built_from, sections = self._section_map
+        if rules is built_from:
+            return sections
+        
+        sections = {}
+        for rule in rules:
+            if rule.category not in ('section', 'standard_header') or 'section' not in rule.extra:
+                continue
+            section = sections.setdefault(rule.extra['section'],
+                                          {'required': False, 'keywords': [], 'header_keywords': []})
+            section['required'] = section['required'] or bool(rule.extra.get('required'))
+            # Phrases of 'line' rules ("project") only count on their own
+            keywords = [(pattern, rule.scope == 'line') for pattern in rule.patterns]
+            section['keywords'] += keywords
+            if rule.extra.get('header', True):
+                section['header_keywords'] += keywords
+        self._section_map = (rules, sections)
+        return sections
@@ -0,0 +1,13 @@
+"""
+Development server entry point: python serve.py
+
+Worker processes (.doc conversion, OCR) are started with multiprocessing
+'spawn', which re-imports the main module in every worker. Keeping app.py out
+of __main__ means workers only import the modules their tasks need instead of
+re-running the app's setup (LLM backend, stores, indexes).
+"""
+
+if __name__ == '__main__':
+    from app import app
+
+    app.run(host='0.0.0.0', port=5000, debug=True)
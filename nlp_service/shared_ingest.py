@@ -0,0 +1,98 @@
+import io
+import mmap
+import os
+import stat
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SharedPathError(ValueError):
+    """Raised when a shared-volume path is outside the ingest root or not a regular file"""
+
+
+class MappedFileReader(io.RawIOBase):
+    """Seekable read-only file object over an mmap, without copying its contents"""
+
+    def __init__(self, mapped: mmap.mmap):
+        super().__init__()
+        self._view = memoryview(mapped)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+class SharedIngest:
+    """
+    Read CVs directly from a shared read-only mount instead of multipart uploads.
+
+    Paths are resolved relative to `root`, with symlinks followed, and must
+    stay inside it. Files are memory-mapped read-only, so extraction reads the
+    page cache directly with no network copy and no multipart parsing.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = os.path.realpath(root)
+        self.max_bytes = max_bytes
+
+    def resolve(self, path: str) -> str:
+        """
+        Resolve a caller-supplied path to a real path inside the ingest root.
+
+        Raises:
+            SharedPathError: If the path escapes the root
+        """
+        real_path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, real_path]) != self.root or real_path == self.root:
+            raise SharedPathError("Path is outside the shared ingest directory")
+        return real_path
+
+    @contextmanager
+    def open_mapped(self, path: str) -> Iterator[mmap.mmap]:
+        """
+        Memory-map a file under the ingest root.
+
+        Raises:
+            SharedPathError: If the path is invalid, not a regular file, empty or too large
+            FileNotFoundError: If the file does not exist
+        """
+        real_path = self.resolve(path)
+        fd = os.open(real_path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+        try:
+            info = os.fstat(fd)
+            if not stat.S_ISREG(info.st_mode):
+                raise SharedPathError("Path is not a regular file")
+            if info.st_size == 0:
+                raise SharedPathError("File is empty")
+            if info.st_size > self.max_bytes:
+                raise SharedPathError("File exceeds the maximum allowed size")
+
+            mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+
+        try:
+            yield mapped
+        finally:
+            mapped.close()
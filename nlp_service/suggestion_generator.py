@@ -1,5 +1,6 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import re
+from rule_engine import RuleHits, get_rule_engine
 
 class SuggestionGenerator:
     """Generate CV improvement suggestions"""
@@ -11,15 +12,20 @@ class SuggestionGenerator:
             'coordinated', 'executed', 'optimized', 'streamlined', 'established'
         ]
     
-    def generate(self, text: str, sections: Dict[str, bool], keywords: List[str]) -> List[Dict[str, Any]]:
-        """Generate improvement suggestions"""
+    def generate(self, text: str, sections: Dict[str, bool], keywords: List[str],
+                 hits: Optional[RuleHits] = None) -> List[Dict[str, Any]]:
+        """
+        Generate improvement suggestions.
+        Pass `hits` to reuse a rule scan shared with the other analyzers.
+        """
+        hits = hits or get_rule_engine().scan(text)
         suggestions = []
         
         # Check for missing sections
         suggestions.extend(self._suggest_missing_sections(sections))
         
         # Check for weak action verbs
-        suggestions.extend(self._suggest_better_verbs(text))
+        suggestions.extend(self._suggest_better_verbs(hits))
         
         # Check for quantifiable achievements
         suggestions.extend(self._suggest_metrics(text))
@@ -50,28 +56,25 @@ class SuggestionGenerator:
         
         return suggestions
     
-    def _suggest_better_verbs(self, text: str) -> List[Dict[str, Any]]:
-        """Suggest replacing weak verbs with stronger action verbs"""
+    def _suggest_better_verbs(self, hits: RuleHits) -> List[Dict[str, Any]]:
+        """Suggest replacing weak verbs with stronger action verbs ('weak_verb' rules)"""
+        matches: Dict[str, List[Dict[str, Any]]] = {}
+        for hit in hits.by_category('weak_verb'):
+            matches.setdefault(hit['rule_id'], []).append(
+                {'line': hit['line'], 'column': hit['column'], 'text': hit['text']})
+
         suggestions = []
-        
-        weak_verbs = {
-            'did': 'executed',
-            'made': 'created',
-            'worked on': 'developed',
-            'was responsible for': 'managed',
-            'helped': 'assisted',
-            'got': 'achieved'
-        }
-        
-        text_lower = text.lower()
-        for weak, strong in weak_verbs.items():
-            if weak in text_lower:
-                suggestions.append({
-                    'type': 'verb_improvement',
-                    'priority': 'medium',
-                    'message': f'Replace "{weak}" with stronger verb like "{strong}"',
-                    'example': f'Instead of "{weak} the project", use "{strong} the project"'
-                })
+        for rule in hits.rules('weak_verb'):
+            if rule.id not in matches:
+                continue
+            weak, strong = rule.patterns[0], rule.extra['replacement']
+            suggestions.append({
+                'type': 'verb_improvement',
+                'priority': rule.severity,
+                'message': rule.message,
+                'example': f'Instead of "{weak} the project", use "{strong} the project"',
+                'matches': matches[rule.id]
+            })
         
         return suggestions
     
@@ -0,0 +1,208 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+DIMENSIONS = ('route', 'tenant', 'prompt_version')
+
+# Tenants past UsageTracker.max_tenants are accounted together under this name
+OVERFLOW_TENANT = '(other)'
+
+
+class BudgetExceeded(Exception):
+    """Raised when a tenant's token budget for the current window is used up"""
+
+    def __init__(self, tenant: str, retry_after: float):
+        super().__init__(f"Token budget exhausted for tenant {tenant}")
+        self.tenant = tenant
+        self.retry_after = retry_after
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """Parse 'tenant-a=200000,tenant-b=50000' into a budget map"""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        tenant, _, tokens = item.partition('=')
+        budgets[tenant.strip()] = int(tokens)
+    return budgets
+
+
+def parse_api_keys(spec: str) -> Dict[str, str]:
+    """Parse 'tenant-a=key1,tenant-b=key2' into a map from sha256(key) to tenant"""
+    tenants = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        tenant, _, api_key = item.partition('=')
+        tenants[hashlib.sha256(api_key.strip().encode('utf-8')).hexdigest()] = tenant.strip()
+    return tenants
+
+
+def _new_totals() -> Dict[str, Any]:
+    return {
+        'calls': 0,
+        'prompt_tokens': 0,
+        'cached_tokens': 0,
+        'output_tokens': 0,
+        'estimated_prompt_tokens': 0,
+        'max_prompt_tokens': 0,
+        'cost_usd': 0.0,
+    }
+
+
+class UsageTracker:
+    """
+    Token and cost accounting for LLM calls.
+
+    Every backend response (including losing hedges) is recorded from its
+    usage_metadata and aggregated per route, per tenant and per prompt version,
+    next to the pre-call estimate so prompts that grew unexpectedly stand out.
+
+    At most `max_tenants` tenants are tracked separately; further tenants
+    without a configured budget share the OVERFLOW_TENANT totals and budget.
+
+    Tenants may have a token budget per fixed window of `window_seconds`.
+    `reserve` holds a call's estimated tokens against the budget while the call
+    runs and raises BudgetExceeded if they do not fit, so callers can fall back
+    to local analysis before spending anything.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, default_budget: int = 0,
+                 window_seconds: float = 86400, input_cost_per_million: float = 0.10,
+                 output_cost_per_million: float = 0.40, cached_cost_per_million: float = 0.025,
+                 max_tenants: int = 1000):
+        self.budgets = budgets or {}
+        self.max_tenants = max_tenants
+        self.default_budget = default_budget
+        self.window_seconds = window_seconds
+        self.input_cost_per_million = input_cost_per_million
+        self.output_cost_per_million = output_cost_per_million
+        self.cached_cost_per_million = cached_cost_per_million
+        self._totals: Dict[str, Dict[str, Dict[str, Any]]] = {
+            dimension: defaultdict(_new_totals) for dimension in DIMENSIONS
+        }
+        self._overall = _new_totals()
+        self._window_start = self._current_window()
+        self._spent: Dict[str, int] = defaultdict(int)
+        self._reserved: Dict[str, int] = defaultdict(int)
+        self._degraded: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def budget_for(self, tenant: str) -> int:
+        """Tokens allowed per window for a tenant (0 means unlimited)"""
+        return self.budgets.get(tenant, self.default_budget)
+
+    def expected_output(self, prompt_version: str) -> int:
+        """Average output tokens seen for a prompt version (0 before its first call)"""
+        with self._lock:
+            totals = self._totals['prompt_version'].get(prompt_version)
+            return totals['output_tokens'] // totals['calls'] if totals and totals['calls'] else 0
+
+    @contextmanager
+    def reserve(self, tenant: str, tokens: int):
+        """
+        Hold `tokens` of the tenant's budget for the duration of a call.
+
+        Raises:
+            BudgetExceeded: If the tenant's remaining budget cannot cover them
+        """
+        with self._lock:
+            self._roll_window()
+            tenant = self._tracked_tenant(tenant)
+            budget = self.budget_for(tenant)
+            if budget and self._spent[tenant] + self._reserved[tenant] + tokens > budget:
+                self._degraded[tenant] += 1
+                raise BudgetExceeded(tenant, self._window_start + self.window_seconds - time.time())
+            self._reserved[tenant] += tokens
+        try:
+            yield
+        finally:
+            with self._lock:
+                remaining = self._reserved.pop(tenant, 0) - tokens
+                if remaining > 0:
+                    self._reserved[tenant] = remaining
+
+    def record(self, route: str, tenant: str, prompt_version: str, usage: Any, estimated_prompt_tokens: int):
+        """Record the usage_metadata of one backend response"""
+        prompt_tokens = getattr(usage, 'prompt_token_count', None)
+        if prompt_tokens is None:
+            # No usage reported: fall back to the estimate so spend is not undercounted
+            prompt_tokens = estimated_prompt_tokens
+        prompt_tokens = int(prompt_tokens or 0)
+        cached_tokens = int(getattr(usage, 'cached_content_token_count', 0) or 0)
+        output_tokens = int(getattr(usage, 'candidates_token_count', 0) or 0)
+        cost = (
+            (prompt_tokens - cached_tokens) * self.input_cost_per_million
+            + cached_tokens * self.cached_cost_per_million
+            + output_tokens * self.output_cost_per_million
+        ) / 1_000_000
+
+        with self._lock:
+            self._roll_window()
+            tenant = self._tracked_tenant(tenant)
+            self._spent[tenant] += prompt_tokens + output_tokens
+            keys = {'route': route, 'tenant': tenant, 'prompt_version': prompt_version}
+            for totals in [self._overall] + [self._totals[dimension][keys[dimension]] for dimension in DIMENSIONS]:
+                totals['calls'] += 1
+                totals['prompt_tokens'] += prompt_tokens
+                totals['cached_tokens'] += cached_tokens
+                totals['output_tokens'] += output_tokens
+                totals['estimated_prompt_tokens'] += estimated_prompt_tokens
+                totals['max_prompt_tokens'] = max(totals['max_prompt_tokens'], prompt_tokens)
+                totals['cost_usd'] += cost
+
+    def stats(self, tenant: Optional[str] = None) -> Dict[str, Any]:
+        """Aggregated usage, optionally restricted to one tenant's totals and budget"""
+        with self._lock:
+            self._roll_window()
+            tenants = [tenant] if tenant else sorted(set(self._spent) | set(self._degraded) | set(self.budgets))
+            budgets = {}
+            for name in tenants:
+                budget = self.budget_for(name)
+                budgets[name] = {
+                    'budget': budget or None,
+                    'spent': self._spent.get(name, 0),
+                    'remaining': max(0, budget - self._spent.get(name, 0)) if budget else None,
+                    'degraded_calls': self._degraded.get(name, 0),
+                }
+            resets_in = round(self._window_start + self.window_seconds - time.time())
+
+            if tenant:
+                return {
+                    'tenant': tenant,
+                    'usage': self._rounded(self._totals['tenant'].get(tenant, _new_totals())),
+                    'budget': dict(budgets[tenant], resets_in=resets_in),
+                }
+            return {
+                'total': self._rounded(self._overall),
+                'by_route': {key: self._rounded(value) for key, value in self._totals['route'].items()},
+                'by_tenant': {key: self._rounded(value) for key, value in self._totals['tenant'].items()},
+                'by_prompt_version': {key: self._rounded(value) for key, value in self._totals['prompt_version'].items()},
+                'budgets': budgets,
+                'budget_window_seconds': self.window_seconds,
+                'budget_resets_in': resets_in,
+            }
+
+    def _tracked_tenant(self, tenant: str) -> str:
+        """The tenant itself, or OVERFLOW_TENANT once max_tenants are tracked (call under the lock)"""
+        tracked = self._totals['tenant']
+        if tenant in self.budgets or tenant in tracked or tenant in self._reserved:
+            return tenant
+        if len(tracked.keys() | self._reserved.keys()) < self.max_tenants:
+            return tenant
+        return OVERFLOW_TENANT
+
+    @staticmethod
+    def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(totals, cost_usd=round(totals['cost_usd'], 6))
+
+    def _current_window(self) -> float:
+        now = time.time()
+        return now - now % self.window_seconds
+
+    def _roll_window(self):
+        window_start = self._current_window()
+        if window_start != self._window_start:
+            self._window_start = window_start
+            self._spent.clear()
+            self._degraded.clear()
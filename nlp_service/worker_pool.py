@@ -0,0 +1,115 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _apply_limits(memory_limit_mb: Optional[int]):
+    """Sandbox the worker: cap its address space and lower its priority"""
+    try:
+        import resource
+
+        if memory_limit_mb:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        os.nice(5)
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not apply worker limits: {str(e)}")
+
+
+def _worker_main(conn, memory_limit_mb: Optional[int]):
+    """Worker loop: receive (func, args), send back ('ok', result) or ('error', message)"""
+    _apply_limits(memory_limit_mb)
+    while True:
+        try:
+            func, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send(('ok', func(*args)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {str(e)}"))
+
+
+class _Worker:
+    """A long-lived worker process and the parent end of its pipe"""
+
+    def __init__(self, ctx, memory_limit_mb: Optional[int]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    Pool of warm, sandboxed worker processes with per-task timeouts.
+
+    Workers start lazily on first use and are reused across tasks, so the
+    process startup cost is paid once. A task that exceeds its timeout gets its
+    worker killed and replaced, leaving other in-flight tasks untouched.
+    `func` must be a picklable module-level function. Spawned workers re-import
+    the main module, so start the service from a light entry point (serve.py).
+    """
+
+    def __init__(self, size: int = 2, memory_limit_mb: Optional[int] = 512,
+                 max_tasks_per_worker: int = 500):
+        self.size = size
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        # spawn (not fork) so workers never inherit locks held by the server's threads
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _start(self):
+        with self._lock:
+            if not self._started:
+                for _ in range(self.size):
+                    self._idle.put(_Worker(self._ctx, self.memory_limit_mb))
+                self._started = True
+
+    def run(self, func: Callable, args: Tuple = (), timeout: float = 30) -> Any:
+        """
+        Run func(*args) in a worker process.
+
+        Raises:
+            TimeoutError: If no worker is free or the task doesn't finish in time
+            RuntimeError: If the task raised inside the worker
+        """
+        self._start()
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No worker available")
+
+        try:
+            worker.conn.send((func, args))
+            if not worker.conn.poll(timeout):
+                raise TimeoutError(f"Worker task exceeded {timeout}s")
+            status, payload = worker.conn.recv()
+            worker.tasks += 1
+        except (TimeoutError, EOFError, OSError):
+            worker.kill()
+            worker = _Worker(self._ctx, self.memory_limit_mb)
+            raise
+        finally:
+            if worker.tasks >= self.max_tasks_per_worker:
+                worker.kill()
+                worker = _Worker(self._ctx, self.memory_limit_mb)
+            self._idle.put(worker)
+
+        if status == 'error':
+            raise RuntimeError(payload)
+        return payload